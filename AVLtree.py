@@ -1,97 +1,431 @@
-class AVLNode:
-    """
-    Node for AVL Tree storing User objects by a key (e.g., ride count or rating).
-    """
-    def __init__(self, user, key):
-        self.user = user
-        self.key = key
-        self.left = None
-        self.right = None
-        self.height = 1
-
-
-class UserAVLTree:
-    """
-    AVL Tree to store and sort users by a specified key (ride count or rating).
-
-    Example:
-        tree = UserAVLTree()
-        tree.insert(User("u001", "Ali", "driver"), 50)
-        sorted_users = tree.inorder()  # list of users sorted by ride count
-    """
-
-    def __init__(self):
-        self.root = None
-
-    def insert(self, user, key):
-        self.root = self._insert(self.root, user, key)
-
-    def _insert(self, node, user, key):
-        if not node:
-            return AVLNode(user, key)
-
-        if key < node.key:
-            node.left = self._insert(node.left, user, key)
-        else:
-            node.right = self._insert(node.right, user, key)
-
-        node.height = 1 + max(self.get_height(node.left), self.get_height(node.right))
-        balance = self.get_balance(node)
-
-        # Rotations
-        if balance > 1 and key < node.left.key:
-            return self.right_rotate(node)
-        if balance < -1 and key > node.right.key:
-            return self.left_rotate(node)
-        if balance > 1 and key > node.left.key:
-            node.left = self.left_rotate(node.left)
-            return self.right_rotate(node)
-        if balance < -1 and key < node.right.key:
-            node.right = self.right_rotate(node.right)
-            return self.left_rotate(node)
-
-        return node
-
-    def inorder(self):
-        """
-        Returns list of users in ascending order based on the sorting key.
-        """
-        result = []
-        self._inorder(self.root, result)
-        return result
-
-    def _inorder(self, node, result):
-        if node:
-            self._inorder(node.left, result)
-            result.append(node.user)
-            self._inorder(node.right, result)
-
-    def get_height(self, node):
-        return node.height if node else 0
-
-    def get_balance(self, node):
-        return self.get_height(node.left) - self.get_height(node.right) if node else 0
-
-    def left_rotate(self, z):
-        y = z.right
-        T2 = y.left
-
-        y.left = z
-        z.right = T2
-
-        z.height = 1 + max(self.get_height(z.left), self.get_height(z.right))
-        y.height = 1 + max(self.get_height(y.left), self.get_height(y.right))
-
-        return y
-
-    def right_rotate(self, z):
-        y = z.left
-        T3 = y.right
-
-        y.right = z
-        z.left = T3
-
-        z.height = 1 + max(self.get_height(z.left), self.get_height(z.right))
-        y.height = 1 + max(self.get_height(y.left), self.get_height(y.right))
-
-        return y
+import math
+from itertools import islice
+
+
+class AVLNode:
+    """
+    Node for AVL Tree storing User objects by a key (e.g., ride count or rating).
+
+    Nodes are ordered by (key, seq), where seq is a unique insertion number, so
+    users with equal keys stay distinct and can be deleted exactly. `size` is the
+    number of nodes in the subtree, used for rank and select.
+    """
+    __slots__ = ("user", "key", "seq", "left", "right", "height", "size")
+
+    def __init__(self, user, key, seq):
+        self.user = user
+        self.key = key
+        self.seq = seq
+        self.left = None
+        self.right = None
+        self.height = 1
+        self.size = 1
+
+
+class UserAVLTree:
+    """
+    AVL Tree to store and sort users by a specified key (ride count or rating).
+
+    The tree is an order-statistics tree: every node knows the size of its
+    subtree, so insert, delete, update, rank and select are all O(log n).
+    Updates and traversals are iterative, a sorted batch of users can be loaded
+    in O(n) with build(), and iter_inorder() scans a key range lazily.
+    Users are also indexed by user_id, so they can be removed or re-keyed
+    without knowing their current key.
+
+    When built with a `key` attribute name, the tree reads the key from the
+    user and subscribes to the user's changes, so the ordering follows
+    User.update_rating / increment_ride_count without any re-sort.
+
+    Example:
+        tree = UserAVLTree()
+        tree.insert(User("u001", "Ali", "driver"), 50)
+        sorted_users = tree.inorder()  # list of users sorted by ride count
+
+        leaderboard = UserAVLTree(key="rating")
+        leaderboard.insert(driver)
+        driver.update_rating(4.0)       # leaderboard re-positions the driver
+        leaderboard.top_k(10)           # ten best rated drivers, best first
+        leaderboard.rank(driver, descending=True)
+    """
+
+    def __init__(self, key=None):
+        """
+        Args:
+            key (str, optional): User attribute to sort by. When omitted, the key
+                has to be passed to insert().
+        """
+        self.root = None
+        self.key_attr = key
+        self.nodes = {}  # user_id -> AVLNode
+        self.next_seq = 0
+
+    def __len__(self):
+        return self._size(self.root)
+
+    def __contains__(self, user):
+        return _user_id(user) in self.nodes
+
+    def insert(self, user, key=None):
+        """
+        Adds a user, or moves it to a new key if it is already in the tree.
+
+        Args:
+            user (User): The user to add.
+            key (optional): Sorting key; defaults to the `key` attribute of the user.
+        """
+        if key is None:
+            key = getattr(user, self.key_attr)
+        if user.user_id in self.nodes:
+            self.update(user, key)
+            return
+        node = AVLNode(user, key, self.next_seq)
+        self.next_seq += 1
+        self._insert(node)
+        self.nodes[user.user_id] = node
+        self._observe(user)
+
+    def build(self, items):
+        """
+        Replaces the contents of the tree with users given in ascending key order, in O(n).
+
+        The tree is built balanced from the middle outwards instead of by n
+        rotating inserts, which makes loading a large leaderboard at startup fast.
+
+        Args:
+            items (iterable): Users (when the tree has a `key` attribute) or
+                (user, key) pairs, sorted by key.
+
+        Raises:
+            ValueError: If the keys are not in ascending order.
+
+        Example:
+            >>> tree = UserAVLTree(key="rating")
+            >>> tree.build(sorted(drivers, key=lambda u: u.rating))
+        """
+        nodes = []
+        by_id = {}
+        previous = None
+        for item in items:
+            if self.key_attr is not None and not isinstance(item, tuple):
+                user, key = item, getattr(item, self.key_attr)
+            else:
+                user, key = item
+            if previous is not None and key < previous:
+                raise ValueError("build() needs users sorted by ascending key")
+            previous = key
+            if user.user_id in by_id:
+                raise ValueError(f"duplicate user {user.user_id}")
+            node = AVLNode(user, key, self.next_seq)
+            self.next_seq += 1
+            nodes.append(node)
+            by_id[user.user_id] = node
+
+        for node in self.nodes.values():
+            self._unobserve(node.user)
+        for node in nodes:
+            self._observe(node.user)
+        self.nodes = by_id
+        self.root = self._build(nodes, 0, len(nodes))
+
+    def delete(self, user):
+        """
+        Removes a user from the tree.
+
+        Args:
+            user (User or str): The user or its user_id.
+
+        Returns:
+            bool: True if the user was in the tree.
+        """
+        node = self.nodes.pop(_user_id(user), None)
+        if node is None:
+            return False
+        self._delete(node)
+        self._unobserve(node.user)
+        return True
+
+    def update(self, user, key=None):
+        """
+        Moves a user to a new key in O(log n).
+
+        Args:
+            user (User or str): The user or its user_id.
+            key (optional): New key; defaults to the `key` attribute of the user.
+        """
+        node = self.nodes.get(_user_id(user))
+        if node is None:
+            return
+        if key is None:
+            key = getattr(node.user, self.key_attr)
+        if key == node.key:
+            return
+        self._delete(node)
+        moved = AVLNode(node.user, key, self.next_seq)
+        self.next_seq += 1
+        self._insert(moved)
+        self.nodes[node.user.user_id] = moved
+
+    def on_user_changed(self, user):
+        """Observer callback registered on users; re-keys the user if needed."""
+        self.update(user)
+
+    def rank(self, user, descending=False):
+        """
+        Returns the 0-based position of a user in the ordering.
+
+        Args:
+            user (User or str): The user or its user_id.
+            descending (bool): Count from the largest key (leaderboard position).
+
+        Returns:
+            int or None: The rank, or None if the user is not in the tree.
+        """
+        target = self.nodes.get(_user_id(user))
+        if target is None:
+            return None
+        position = (target.key, target.seq)
+        rank = 0
+        node = self.root
+        while node is not None:
+            current = (node.key, node.seq)
+            if position < current:
+                node = node.left
+            elif position > current:
+                rank += self._size(node.left) + 1
+                node = node.right
+            else:
+                rank += self._size(node.left)
+                break
+        return len(self) - 1 - rank if descending else rank
+
+    def select(self, index, descending=False):
+        """
+        Returns the user at a 0-based position of the ordering.
+
+        Args:
+            index (int): Position; negative values count from the end.
+            descending (bool): Count from the largest key.
+
+        Raises:
+            IndexError: If the position is out of range.
+        """
+        total = len(self)
+        if index < 0:
+            index += total
+        if not 0 <= index < total:
+            raise IndexError("tree index out of range")
+        if descending:
+            index = total - 1 - index
+        node = self.root
+        while True:
+            left_size = self._size(node.left)
+            if index < left_size:
+                node = node.left
+            elif index > left_size:
+                index -= left_size + 1
+                node = node.right
+            else:
+                return node.user
+
+    def top_k(self, k):
+        """Returns the k users with the largest keys, largest first."""
+        return list(islice(self.iter_inorder(reverse=True), k))
+
+    def percentile(self, p):
+        """
+        Returns the user at the p-th percentile of the keys (nearest-rank method).
+
+        Args:
+            p (float): Percentile between 0 and 100.
+
+        Returns:
+            User or None: None if the tree is empty.
+        """
+        total = len(self)
+        if total == 0:
+            return None
+        index = max(0, math.ceil(p / 100.0 * total) - 1)
+        return self.select(min(index, total - 1))
+
+    def percentile_of(self, user):
+        """Returns the percentage of users ranked below the given user, or None."""
+        rank = self.rank(user)
+        if rank is None:
+            return None
+        return 100.0 * rank / len(self)
+
+    def iter_inorder(self, start=None, stop=None, reverse=False):
+        """
+        Lazily yields users in key order, optionally limited to a key range.
+
+        Only the current root-to-node path is kept in memory, so a range scan
+        costs O(log n) to start plus O(1) amortized per user yielded.
+
+        Args:
+            start (optional): First key to yield (inclusive); the largest key when reverse.
+            stop (optional): Key at which to stop (exclusive).
+            reverse (bool): Yield the largest keys first.
+
+        Example:
+            >>> for driver in tree.iter_inorder(start=4.5):
+            ...     print(driver)
+        """
+        stack = []
+        node = self.root
+        while True:
+            while node is not None:
+                if start is not None and (node.key > start if reverse else node.key < start):
+                    # The whole near subtree is outside the range
+                    node = node.left if reverse else node.right
+                    continue
+                stack.append(node)
+                node = node.right if reverse else node.left
+            if not stack:
+                return
+            node = stack.pop()
+            if stop is not None and (node.key <= stop if reverse else node.key >= stop):
+                return
+            yield node.user
+            node = node.left if reverse else node.right
+
+    __iter__ = iter_inorder
+
+    def inorder(self):
+        """
+        Returns list of users in ascending order based on the sorting key.
+        """
+        return list(self.iter_inorder())
+
+    def _insert(self, new):
+        """Links a node in iteratively and rebalances the path back to the root."""
+        position = (new.key, new.seq)
+        path = []
+        node = self.root
+        while node is not None:
+            went_left = position < (node.key, node.seq)
+            path.append((node, went_left))
+            node = node.left if went_left else node.right
+        self._retrace(path, new)
+
+    def _delete(self, target):
+        """Unlinks a node iteratively and rebalances the path back to the root."""
+        position = (target.key, target.seq)
+        path = []
+        node = self.root
+        while node is not target:
+            went_left = position < (node.key, node.seq)
+            path.append((node, went_left))
+            node = node.left if went_left else node.right
+
+        if node.left is None or node.right is None:
+            child = node.left or node.right
+        else:
+            # Move the in-order successor into the removed node's place
+            path.append((None, False))
+            slot = len(path) - 1
+            successor = node.right
+            while successor.left is not None:
+                path.append((successor, True))
+                successor = successor.left
+            child = successor.right
+            successor.left = node.left
+            successor.right = node.right
+            path[slot] = (successor, False)
+        self._retrace(path, child)
+
+    def _retrace(self, path, child):
+        """Re-attaches `child` below the last node of `path`, rebalancing up to the root."""
+        for node, went_left in reversed(path):
+            if went_left:
+                node.left = child
+            else:
+                node.right = child
+            child = self._rebalance(node)
+        self.root = child
+
+    def _build(self, nodes, low, high):
+        """Links nodes[low:high] into a perfectly balanced subtree and returns its root."""
+        if low >= high:
+            return None
+        mid = (low + high) // 2
+        node = nodes[mid]
+        node.left = self._build(nodes, low, mid)
+        node.right = self._build(nodes, mid + 1, high)
+        self._refresh(node)
+        return node
+
+    def _rebalance(self, node):
+        self._refresh(node)
+        left, right = node.left, node.right
+        balance = (left.height if left else 0) - (right.height if right else 0)
+
+        # Rotations
+        if balance > 1:
+            if self.get_balance(left) < 0:
+                node.left = self.left_rotate(left)
+            return self.right_rotate(node)
+        if balance < -1:
+            if self.get_balance(right) > 0:
+                node.right = self.right_rotate(right)
+            return self.left_rotate(node)
+        return node
+
+    def _observe(self, user):
+        if self.key_attr is not None and hasattr(user, "add_observer"):
+            user.add_observer(self.on_user_changed)
+
+    def _unobserve(self, user):
+        if self.key_attr is not None and hasattr(user, "remove_observer"):
+            user.remove_observer(self.on_user_changed)
+
+    def get_height(self, node):
+        return node.height if node else 0
+
+    def get_balance(self, node):
+        return self.get_height(node.left) - self.get_height(node.right) if node else 0
+
+    def left_rotate(self, z):
+        y = z.right
+        T2 = y.left
+
+        y.left = z
+        z.right = T2
+
+        self._refresh(z)
+        self._refresh(y)
+        return y
+
+    def right_rotate(self, z):
+        y = z.left
+        T3 = y.right
+
+        y.right = z
+        z.left = T3
+
+        self._refresh(z)
+        self._refresh(y)
+        return y
+
+    @staticmethod
+    def _refresh(node):
+        """Recomputes the height and subtree size of a node from its children."""
+        left, right = node.left, node.right
+        if left is None:
+            if right is None:
+                node.height, node.size = 1, 1
+            else:
+                node.height, node.size = right.height + 1, right.size + 1
+        elif right is None:
+            node.height, node.size = left.height + 1, left.size + 1
+        else:
+            node.height = (left.height if left.height > right.height else right.height) + 1
+            node.size = left.size + right.size + 1
+
+    @staticmethod
+    def _size(node):
+        return node.size if node else 0
+
+
+def _user_id(user):
+    return getattr(user, "user_id", user)
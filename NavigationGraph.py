@@ -1,63 +1,682 @@
-import heapq
-from collections import defaultdict
-
-class NavigationGraph:
-    """
-    A graph-based navigation system using Dijkstra's algorithm to find shortest paths.
-
-    Attributes:
-        graph (dict): A dictionary of location nodes and their neighbors with edge weights.
-
-    Example:
-        nav = NavigationGraph()
-        nav.add_road("A", "B", 5)
-        nav.add_road("A", "C", 10)
-        nav.add_road("B", "C", 2)
-        nav.shortest_path("A", "C")  # (7, ['A', 'B', 'C'])
-    """
-
-    def __init__(self):
-        self.graph = defaultdict(list)
-
-    def add_road(self, from_location, to_location, distance):
-        """
-        Adds a bidirectional road (edge) between two locations.
-
-        Args:
-            from_location (str): Starting location.
-            to_location (str): Destination location.
-            distance (int or float): Distance between locations.
-        """
-        self.graph[from_location].append((to_location, distance))
-        self.graph[to_location].append((from_location, distance))
-
-    def shortest_path(self, start, end):
-        """
-        Computes the shortest path from start to end using Dijkstra's algorithm.
-
-        Args:
-            start (str): Starting location.
-            end (str): Destination location.
-
-        Returns:
-            (distance, path): Tuple of total distance and list of nodes in the shortest path.
-        """
-        distances = {node: float('inf') for node in self.graph}
-        distances[start] = 0
-        queue = [(0, start, [])]
-
-        while queue:
-            current_distance, current_node, path = heapq.heappop(queue)
-            if current_node == end:
-                return current_distance, path + [end]
-
-            if current_distance > distances[current_node]:
-                continue
-
-            for neighbor, weight in self.graph[current_node]:
-                distance = current_distance + weight
-                if distance < distances[neighbor]:
-                    distances[neighbor] = distance
-                    heapq.heappush(queue, (distance, neighbor, path + [current_node]))
-
-        return float('inf'), []
+import hashlib
+import heapq
+import math
+import threading
+from array import array
+from collections import defaultdict
+from contraction_hierarchy import ContractionHierarchy
+from geo_utils import haversine, parse_geo
+from route_cache import RouteCache
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; many_to_many then returns a list of rows
+    np = None
+
+class NavigationGraph:
+    """
+    A graph-based navigation system using Dijkstra's algorithm to find shortest paths.
+
+    Roads are collected in a mutable adjacency dict while the graph is being
+    built. freeze() then compiles it into compressed sparse row (CSR) arrays:
+    node names are interned to integer IDs, and the neighbors of node i are
+    targets[offsets[i]:offsets[i + 1]] with matching weights. Queries run on the
+    compiled form and freeze the graph automatically; adding a road afterwards
+    thaws it back into the mutable form.
+
+    Searches record each node's parent and rebuild the path once at the end.
+    When node coordinates are known, A* (guided by the great-circle distance to
+    the destination) and bidirectional Dijkstra expand far fewer nodes than the
+    plain radial search. For many repeated queries, build_contraction_hierarchy()
+    preprocesses the roads into a ContractionHierarchy that answers queries with
+    method='ch' in a fraction of the time.
+
+    Live traffic is applied as a per-road weight overlay (update_live_weights)
+    on top of the static distances. Searches read `live_weights`, a CSR-aligned
+    array with the overlay already applied, so traffic costs nothing extra per
+    edge relaxation and the graph is never rebuilt. A contraction hierarchy built
+    before a traffic change is marked stale: method='ch' then falls back to
+    bidirectional search until refresh_contraction_hierarchy() re-contracts it
+    for the new weights.
+
+    Attributes:
+        graph (dict): A dictionary of location nodes and their neighbors with edge weights
+            (build phase only; emptied by freeze()).
+        coordinates (dict): Maps location nodes to (lat, lon) for the A* heuristic.
+        heuristic_scale (float): Converts kilometers into edge weight units. The A*
+            heuristic is only a lower bound (and A* only exact) if no road is
+            shorter than heuristic_scale times the straight-line distance it covers.
+        frozen (bool): True while the graph is stored in CSR form.
+        node_ids (dict): Maps location name -> integer node ID (frozen only).
+        node_names (list): Maps integer node ID -> location name (frozen only).
+        offsets, targets, weights (array): CSR adjacency arrays (frozen only).
+        live_weights (array): Weights used by searches; `weights` itself when no overlay is set.
+        live_overlay (dict): Maps frozenset({a, b}) road -> live weight from the traffic feed.
+        ch (ContractionHierarchy): Preprocessed index, or None. Dropped when roads are added.
+        ch_stale (bool): True if weights changed since the contraction hierarchy was built.
+        route_cache (RouteCache): LRU cache of shortest_path results.
+        version (int): Incremented on every change that can shorten a cached route;
+            cached routes from older versions are discarded on lookup.
+        last_expanded (int): Number of nodes settled by the most recent search.
+        lock (threading.RLock): Held by freeze/thaw, every road or weight change and
+            every search, so concurrent callers never see a half-compiled graph.
+
+    Example:
+        nav = NavigationGraph()
+        nav.add_road("A", "B", 5)
+        nav.add_road("A", "C", 10)
+        nav.add_road("B", "C", 2)
+        nav.freeze()
+        nav.shortest_path("A", "C")  # (7.0, ['A', 'B', 'C'])
+        nav.shortest_path("A", "C", method="bidirectional")  # (7.0, ['A', 'B', 'C'])
+    """
+
+    def __init__(self, heuristic_scale=1.0, cache_size=1024, cache_bytes=None, cache_ttl=None):
+        """
+        Args:
+            heuristic_scale (float): Kilometers to edge weight units, for the A* heuristic.
+            cache_size (int): Maximum number of cached routes; 0 disables the route cache.
+            cache_bytes (int, optional): Limit on the estimated memory used by cached routes.
+            cache_ttl (float, optional): Seconds a cached route stays valid.
+        """
+        self.graph = defaultdict(list)
+        self.coordinates = {}
+        self.heuristic_scale = heuristic_scale
+        self.last_expanded = 0
+        self.frozen = False
+        self.node_ids = {}
+        self.node_names = []
+        self.offsets = array('i', [0])
+        self.targets = array('i')
+        self.weights = array('d')
+        self.lats = array('d')
+        self.lons = array('d')
+        self.live_weights = self.weights
+        self.live_overlay = {}
+        self.ch = None
+        self.ch_stale = False
+        self.route_cache = RouteCache(cache_size, cache_bytes, cache_ttl)
+        self.version = 0
+        self.lock = threading.RLock()
+
+    def __len__(self):
+        return len(self.node_names) if self.frozen else len(self.graph)
+
+    def __contains__(self, location):
+        return location in self.node_ids if self.frozen else location in self.graph
+
+    def add_road(self, from_location, to_location, distance, from_geo=None, to_geo=None):
+        """
+        Adds a bidirectional road (edge) between two locations.
+
+        Args:
+            from_location (str): Starting location.
+            to_location (str): Destination location.
+            distance (int or float): Distance between locations.
+            from_geo (tuple or str, optional): Coordinates of the starting location.
+            to_geo (tuple or str, optional): Coordinates of the destination location.
+        """
+        with self.lock:
+            if self.frozen:
+                self.thaw()
+            # A new road can shorten routes anywhere, so every cached route is invalidated
+            self.version += 1
+            self.graph[from_location].append((to_location, distance))
+            self.graph[to_location].append((from_location, distance))
+            if from_geo is not None:
+                self.set_location(from_location, from_geo)
+            if to_geo is not None:
+                self.set_location(to_location, to_geo)
+
+    def update_road(self, from_location, to_location, distance):
+        """
+        Changes the distance of an existing road in place, without rebuilding the graph.
+
+        If the road gets longer only the cached routes that use it are dropped; if
+        it gets shorter any route could now go through it, so the whole cache is
+        invalidated. A live traffic weight set for the road keeps precedence.
+
+        Args:
+            from_location (str): One end of the road.
+            to_location (str): The other end of the road.
+            distance (int or float): New distance.
+
+        Returns:
+            bool: True if the road exists and was updated, False otherwise.
+        """
+        with self.lock:
+            old = self._set_weight(from_location, to_location, distance)
+            if old is None:
+                return False
+            if frozenset((from_location, to_location)) not in self.live_overlay:
+                self._weights_changed([(from_location, to_location, old, distance)])
+            return True
+
+    def update_live_weights(self, updates):
+        """
+        Applies a batch of live road weights (e.g., travel times from a traffic feed).
+
+        Roads that do not exist are ignored. Routes cached before the update are
+        invalidated as in update_road, with at most one cache-wide invalidation
+        per batch.
+
+        Args:
+            updates (iterable): (from_location, to_location, weight) tuples.
+
+        Returns:
+            int: Number of roads updated.
+
+        Example:
+            nav.update_live_weights([("A", "B", 9), ("B", "C", 4)])
+        """
+        with self.lock:
+            changes = []
+            for from_location, to_location, weight in updates:
+                old = self.live_weight(from_location, to_location)
+                if old is None:
+                    continue
+                self.live_overlay[frozenset((from_location, to_location))] = weight
+                if self.frozen:
+                    self._write_live(from_location, to_location, weight)
+                changes.append((from_location, to_location, old, weight))
+            self._weights_changed(changes)
+            return len(changes)
+
+    def clear_live_weights(self):
+        """Removes every live weight so routing uses the static road distances again."""
+        with self.lock:
+            if not self.live_overlay:
+                return
+            self.live_overlay = {}
+            self.live_weights = self.weights
+            self.version += 1
+            if self.ch is not None:
+                self.ch_stale = True
+
+    def live_weight(self, from_location, to_location):
+        """
+        Returns the weight routing currently uses for a road.
+
+        Args:
+            from_location (str): One end of the road.
+            to_location (str): The other end of the road.
+
+        Returns:
+            float or None: The live weight if set, else the road distance, or None if there is no such road.
+        """
+        with self.lock:
+            weight = self.live_overlay.get(frozenset((from_location, to_location)))
+            if weight is not None:
+                return weight
+            distances = [w for neighbor, w in self.neighbors(from_location) if neighbor == to_location]
+            return min(distances) if distances else None
+
+    def _weights_changed(self, changes):
+        """Invalidates cached routes and the contraction hierarchy after weight changes."""
+        shortened = False
+        for from_location, to_location, old, new in changes:
+            if new > old:
+                self.route_cache.invalidate_edge(from_location, to_location)
+            elif new < old:
+                shortened = True
+            if new != old and self.ch is not None:
+                self.ch_stale = True
+        if shortened:
+            self.version += 1
+
+    def _write_live(self, from_location, to_location, weight):
+        """Writes a live weight into the CSR-aligned live array, copying it off the base weights first."""
+        if self.live_weights is self.weights:
+            self.live_weights = array('d', self.weights)
+        for e in self._edge_slots(from_location, to_location):
+            self.live_weights[e] = weight
+
+    def _edge_slots(self, from_location, to_location):
+        """Yields the CSR indexes of the edges between two locations, in both directions."""
+        u = self.node_ids.get(from_location)
+        v = self.node_ids.get(to_location)
+        if u is None or v is None:
+            return
+        for a, b in ((u, v), (v, u)):
+            for e in range(self.offsets[a], self.offsets[a + 1]):
+                if self.targets[e] == b:
+                    yield e
+
+    def _set_weight(self, from_location, to_location, distance):
+        """Sets the weight of every edge between two locations; returns the old shortest one or None."""
+        old = None
+        if not self.frozen:
+            for a, b in ((from_location, to_location), (to_location, from_location)):
+                roads = self.graph.get(a, [])
+                for i, (neighbor, weight) in enumerate(roads):
+                    if neighbor == b:
+                        old = weight if old is None else min(old, weight)
+                        roads[i] = (neighbor, distance)
+            return old
+
+        overlaid = frozenset((from_location, to_location)) in self.live_overlay
+        for e in self._edge_slots(from_location, to_location):
+            old = self.weights[e] if old is None else min(old, self.weights[e])
+            self.weights[e] = distance
+            if not overlaid:
+                self.live_weights[e] = distance
+        return old
+
+    def set_location(self, location, location_geo):
+        """
+        Records the coordinates of a location node, used by the A* heuristic.
+
+        Args:
+            location (str): Location node.
+            location_geo (tuple or str): Coordinates of the location.
+        """
+        with self.lock:
+            point = parse_geo(location_geo)
+            if point is None:
+                return
+            self.coordinates[location] = point
+            node = self.node_ids.get(location) if self.frozen else None
+            if node is not None:
+                self.lats[node], self.lons[node] = point
+
+    def neighbors(self, location):
+        """
+        Returns the roads leaving a location.
+
+        Args:
+            location (str): Location node.
+
+        Returns:
+            list: (neighbor, distance) tuples.
+        """
+        if not self.frozen:
+            return list(self.graph.get(location, ()))
+        node = self.node_ids.get(location)
+        if node is None:
+            return []
+        names, targets, weights = self.node_names, self.targets, self.weights
+        return [(names[targets[e]], weights[e]) for e in range(self.offsets[node], self.offsets[node + 1])]
+
+    def freeze(self):
+        """
+        Compiles the adjacency dict into CSR arrays and releases the dict.
+
+        Node names are interned to integer IDs in insertion order. Called
+        automatically by the first query after the graph changes.
+        """
+        with self.lock:
+            if self.frozen:
+                return
+            names = list(self.graph)
+            ids = {name: i for i, name in enumerate(names)}
+            offsets = array('i', [0])
+            targets = array('i')
+            weights = array('d')
+            for name in names:
+                for neighbor, weight in self.graph[name]:
+                    targets.append(ids[neighbor])
+                    weights.append(weight)
+                offsets.append(len(targets))
+
+            lats = array('d', [math.nan]) * len(names)
+            lons = array('d', [math.nan]) * len(names)
+            for name, (lat, lon) in self.coordinates.items():
+                node = ids.get(name)
+                if node is not None:
+                    lats[node], lons[node] = lat, lon
+
+            self.node_names, self.node_ids = names, ids
+            self.offsets, self.targets, self.weights = offsets, targets, weights
+            self.lats, self.lons = lats, lons
+            self.live_weights = weights
+            self.frozen = True
+            self.graph = defaultdict(list)
+            for road, weight in self.live_overlay.items():
+                if len(road) == 2:
+                    self._write_live(*road, weight)
+
+    def thaw(self):
+        """Expands the CSR arrays back into the mutable adjacency dict so roads can be added."""
+        with self.lock:
+            if not self.frozen:
+                return
+            self.ch = None
+            graph = defaultdict(list)
+            for node, name in enumerate(self.node_names):
+                graph[name] = self.neighbors(name)
+            self.graph = graph
+            self.frozen = False
+            self.node_ids, self.node_names = {}, []
+            self.offsets, self.targets, self.weights = array('i', [0]), array('i'), array('d')
+            self.live_weights = self.weights
+            self.lats, self.lons = array('d'), array('d')
+
+    def signature(self):
+        """
+        Returns a fingerprint of the roads and the weights routing currently uses.
+
+        Used to check that a saved contraction hierarchy belongs to this graph.
+
+        Returns:
+            str: Hex digest over node names and the CSR arrays.
+        """
+        with self.lock:
+            self.freeze()
+            digest = hashlib.sha1(repr(self.node_names).encode())
+            for values in (self.offsets, self.targets, self.live_weights):
+                digest.update(values.tobytes())
+            return digest.hexdigest()
+
+    def build_contraction_hierarchy(self, witness_settle_limit=64):
+        """
+        Preprocesses the roads into a contraction hierarchy for fast queries.
+
+        Args:
+            witness_settle_limit (int): Search effort per witness search; see ContractionHierarchy.build.
+
+        Returns:
+            ContractionHierarchy: The index, also kept in `ch`.
+
+        Example:
+            nav.build_contraction_hierarchy()
+            nav.shortest_path("A", "C", method="ch")  # (7.0, ['A', 'B', 'C'])
+        """
+        with self.lock:
+            self.ch = ContractionHierarchy.build(self, witness_settle_limit=witness_settle_limit)
+            self.ch_stale = False
+            return self.ch
+
+    def refresh_contraction_hierarchy(self, witness_settle_limit=64):
+        """
+        Re-contracts a stale contraction hierarchy for the current live weights.
+
+        The node order of the existing hierarchy is reused, which skips the costly
+        ordering phase. Meant to run after a batch of traffic updates.
+
+        Returns:
+            ContractionHierarchy: The refreshed index.
+        """
+        with self.lock:
+            if self.ch is None:
+                return self.build_contraction_hierarchy(witness_settle_limit)
+            if self.ch_stale:
+                self.ch = ContractionHierarchy.build(self, order=self.ch.order(),
+                                                     witness_settle_limit=witness_settle_limit)
+                self.ch_stale = False
+            return self.ch
+
+    def save_contraction_hierarchy(self, path):
+        """
+        Writes the contraction hierarchy to a file, building it first if needed.
+
+        Args:
+            path (str): Destination file path.
+        """
+        self.refresh_contraction_hierarchy()
+        self.ch.save(path)
+
+    def load_contraction_hierarchy(self, path):
+        """
+        Loads a contraction hierarchy saved for this exact graph.
+
+        Args:
+            path (str): File written by save_contraction_hierarchy().
+
+        Raises:
+            ValueError: If the file was built from different roads or weights.
+        """
+        with self.lock:
+            ch = ContractionHierarchy.load(path)
+            if ch.signature != self.signature():
+                raise ValueError("Contraction hierarchy was built from a different road graph")
+            self.ch = ch
+            self.ch_stale = False
+
+    def shortest_path(self, start, end, method="dijkstra"):
+        """
+        Computes the shortest path from start to end.
+
+        Repeated queries are answered from `route_cache` until a road change invalidates them.
+
+        Args:
+            start (str): Starting location.
+            end (str): Destination location.
+            method (str): 'dijkstra', 'astar' (needs coordinates, falls back to Dijkstra
+                for nodes without them), 'bidirectional' or 'ch' (contraction
+                hierarchy, built on first use; bidirectional while it is stale).
+
+        Returns:
+            (distance, path): Tuple of total distance and list of nodes in the shortest path.
+        """
+        if method not in ("dijkstra", "astar", "bidirectional", "ch"):
+            raise ValueError(f"Unknown shortest path method: {method}")
+        cached = self.route_cache.get((start, end), self.version)  # RouteCache has its own lock
+        if cached is not None:
+            self.last_expanded = 0
+            return cached[0], list(cached[1])
+
+        with self.lock:
+            self.freeze()
+            source = self.node_ids.get(start)
+            target = self.node_ids.get(end)
+            if source is None or target is None:
+                self.last_expanded = 0
+                return (0, [start]) if start == end else (float('inf'), [])
+
+            if method == "ch" and self.ch is None:
+                self.build_contraction_hierarchy()
+            if method == "ch" and not self.ch_stale:
+                distance, path = self.ch.shortest_path(source, target)
+                self.last_expanded = self.ch.last_expanded
+            elif method in ("bidirectional", "ch"):
+                distance, path = self._bidirectional(source, target)
+            else:
+                heuristic = self._heuristic_to(target) if method == "astar" else None
+                distance, path = self._dijkstra(source, target, heuristic)
+            names = self.node_names
+            path = [names[node] for node in path]
+            if path:
+                self.route_cache.put((start, end), distance, tuple(path), self.version)
+            return distance, path
+
+    def one_to_many(self, start, ends):
+        """
+        Computes the shortest distances from one location to many in a single search.
+
+        Without a contraction hierarchy, one Dijkstra search runs from `start` and
+        stops as soon as every reachable end has been settled. With one, the
+        distances are read from the upward search spaces of the endpoints.
+
+        Args:
+            start (str): Starting location (e.g., a pickup point).
+            ends (list): Destination locations (e.g., candidate vehicle locations).
+
+        Returns:
+            list: Distances aligned with `ends`; inf for unknown or unreachable locations.
+
+        Example:
+            nav.one_to_many("A", ["B", "C"])  # [5.0, 7.0]
+        """
+        with self.lock:
+            self.freeze()
+            if self.ch is not None and not self.ch_stale:
+                return self._ch_many_to_many([start], ends)[0]
+            return self._one_to_many(start, ends)
+
+    def many_to_many(self, starts, ends):
+        """
+        Computes the shortest distance between every start and every end location.
+
+        With a contraction hierarchy this uses the bucket method: one upward search
+        per end fills per-node buckets, and one upward search per start scans them,
+        so the cost is len(starts) + len(ends) small searches. Otherwise one
+        one_to_many search runs per start.
+
+        Args:
+            starts (list): Starting locations.
+            ends (list): Destination locations.
+
+        Returns:
+            numpy.ndarray or list: len(starts) x len(ends) distances (a list of rows when
+            NumPy is unavailable); inf for unknown or unreachable pairs.
+        """
+        with self.lock:
+            self.freeze()
+            if self.ch is None or self.ch_stale:
+                rows = [self._one_to_many(start, ends) for start in starts]
+            else:
+                rows = self._ch_many_to_many(starts, ends)
+            if np is not None:
+                return np.array(rows, dtype=np.float64).reshape(len(starts), len(ends))
+            return rows
+
+    def _one_to_many(self, start, ends):
+        """Single-source Dijkstra that stops once every end is settled."""
+        self.freeze()
+        source = self.node_ids.get(start)
+        result = [math.inf] * len(ends)
+        pending = {}
+        for i, end in enumerate(ends):
+            if end == start:
+                result[i] = 0.0
+            elif source is not None and end in self.node_ids:
+                pending.setdefault(self.node_ids[end], []).append(i)
+        if not pending:
+            return result
+
+        offsets, targets, weights = self.offsets, self.targets, self.live_weights
+        distances = {source: 0.0}
+        queue = [(0.0, source)]
+        while queue and pending:
+            current_distance, node = heapq.heappop(queue)
+            if current_distance > distances[node]:
+                continue
+            for i in pending.pop(node, ()):
+                result[i] = current_distance
+            for e in range(offsets[node], offsets[node + 1]):
+                neighbor = targets[e]
+                distance = current_distance + weights[e]
+                if distance < distances.get(neighbor, math.inf):
+                    distances[neighbor] = distance
+                    heapq.heappush(queue, (distance, neighbor))
+        return result
+
+    def _ch_many_to_many(self, starts, ends):
+        """Bucket-based many-to-many over the contraction hierarchy."""
+        buckets = defaultdict(list)  # node -> [(end index, upward distance from that end)]
+        for j, end in enumerate(ends):
+            target = self.node_ids.get(end)
+            if target is not None:
+                for node, distance in self.ch.upward_search(target).items():
+                    buckets[node].append((j, distance))
+
+        rows = []
+        for start in starts:
+            row = [math.inf] * len(ends)
+            source = self.node_ids.get(start)
+            if source is not None:
+                for node, distance in self.ch.upward_search(source).items():
+                    for j, end_distance in buckets.get(node, ()):
+                        if distance + end_distance < row[j]:
+                            row[j] = distance + end_distance
+            for j, end in enumerate(ends):
+                if end == start:
+                    row[j] = 0.0
+            rows.append(row)
+        return rows
+
+    def _heuristic_to(self, target):
+        """Returns a function giving a lower bound on the distance from a node to `target`."""
+        target_point = (self.lats[target], self.lons[target])
+        if math.isnan(target_point[0]):
+            return None
+        lats, lons = self.lats, self.lons
+        scale = self.heuristic_scale
+
+        def heuristic(node):
+            lat = lats[node]
+            return 0 if lat != lat else scale * haversine((lat, lons[node]), target_point)
+        return heuristic
+
+    def _dijkstra(self, source, target, heuristic):
+        """Dijkstra, or A* when a heuristic is given, with parent pointers."""
+        offsets, targets, weights = self.offsets, self.targets, self.live_weights
+        distances = {source: 0.0}
+        parents = {source: -1}
+        queue = [(heuristic(source) if heuristic else 0.0, 0.0, source)]
+        expanded = 0
+
+        while queue:
+            _, current_distance, node = heapq.heappop(queue)
+            if current_distance > distances[node]:
+                continue
+            expanded += 1
+            if node == target:
+                self.last_expanded = expanded
+                return current_distance, self._build_path(parents, target)
+
+            for e in range(offsets[node], offsets[node + 1]):
+                neighbor = targets[e]
+                distance = current_distance + weights[e]
+                if distance < distances.get(neighbor, math.inf):
+                    distances[neighbor] = distance
+                    parents[neighbor] = node
+                    estimate = distance + heuristic(neighbor) if heuristic else distance
+                    heapq.heappush(queue, (estimate, distance, neighbor))
+
+        self.last_expanded = expanded
+        return float('inf'), []
+
+    def _bidirectional(self, source, target):
+        """Dijkstra from both ends at once, stopping when the frontiers prove the best meeting point."""
+        if source == target:
+            self.last_expanded = 1
+            return 0.0, [source]
+
+        offsets, targets, weights = self.offsets, self.targets, self.live_weights
+        distances = ({source: 0.0}, {target: 0.0})
+        parents = ({source: -1}, {target: -1})
+        queues = ([(0.0, source)], [(0.0, target)])
+        settled = (set(), set())
+        best, meeting = math.inf, None
+        expanded = 0
+
+        while queues[0] and queues[1]:
+            if queues[0][0][0] + queues[1][0][0] >= best:
+                break
+            # Advance the side with the smaller frontier
+            side = 0 if len(queues[0]) <= len(queues[1]) else 1
+            dist, other_dist = distances[side], distances[1 - side]
+            current_distance, node = heapq.heappop(queues[side])
+            if node in settled[side]:
+                continue
+            settled[side].add(node)
+            expanded += 1
+
+            for e in range(offsets[node], offsets[node + 1]):
+                neighbor = targets[e]
+                distance = current_distance + weights[e]
+                if distance < dist.get(neighbor, math.inf):
+                    dist[neighbor] = distance
+                    parents[side][neighbor] = node
+                    heapq.heappush(queues[side], (distance, neighbor))
+                if neighbor in other_dist and distance + other_dist[neighbor] < best:
+                    best = distance + other_dist[neighbor]
+                    meeting = neighbor
+
+        self.last_expanded = expanded
+        if meeting is None:
+            return float('inf'), []
+        forward = self._build_path(parents[0], meeting)
+        backward = self._build_path(parents[1], meeting)
+        return best, forward + backward[-2::-1]
+
+    @staticmethod
+    def _build_path(parents, node):
+        """Follows parent pointers back from `node` and returns the path from the search origin."""
+        path = []
+        while node != -1:
+            path.append(node)
+            node = parents[node]
+        path.reverse()
+        return path
@@ -1,67 +1,142 @@
-import heapq
-
-class RidePriorityQueue:
-    """
-    Implements a priority queue (min-heap) to allocate rides to vehicles based on the lowest cost.
-
-    Attributes:
-        queue (list): The list maintaining the heap structure.
-        entry_finder (dict): Maps vehicle IDs to heap entries for quick updates.
-        counter (int): Unique sequence count to prevent comparison issues.
-
-    Example:
-        pq = RidePriorityQueue()
-        pq.add_vehicle("car_101", 12)
-        pq.add_vehicle("car_205", 7)
-        pq.get_best_vehicle()  # ('car_205', 7)
-        pq.remove_vehicle("car_205")
-        pq.get_best_vehicle()  # ('car_101', 12)
-    """
-
-    def __init__(self):
-        self.queue = []
-        self.entry_finder = {}  # Maps vehicle_id -> entry
-        self.REMOVED = "<removed-vehicle>"
-        self.counter = 0
-
-    def add_vehicle(self, vehicle_id, priority):
-        """
-        Adds or updates a vehicle in the priority queue.
-
-        Args:
-            vehicle_id (str): Unique identifier of the vehicle.
-            priority (int or float): Cost/urgency value; lower = higher priority.
-        """
-        if vehicle_id in self.entry_finder:
-            self.remove_vehicle(vehicle_id)
-        entry = [priority, self.counter, vehicle_id]
-        self.entry_finder[vehicle_id] = entry
-        heapq.heappush(self.queue, entry)
-        self.counter += 1
-
-    def remove_vehicle(self, vehicle_id):
-        """
-        Marks a vehicle as removed.
-
-        Args:
-            vehicle_id (str): Vehicle to remove from the queue.
-        """
-        entry = self.entry_finder.pop(vehicle_id)
-        entry[-1] = self.REMOVED
-
-    def get_best_vehicle(self):
-        """
-        Returns the vehicle with the highest priority (lowest cost).
-
-        Returns:
-            tuple: (vehicle_id, priority) or None if no vehicles available.
-        """
-        while self.queue:
-            priority, count, vehicle_id = heapq.heappop(self.queue)
-            if vehicle_id is not self.REMOVED:
-                del self.entry_finder[vehicle_id]
-                return vehicle_id, priority
-        return None
-
-    def __len__(self):
-        return len(self.entry_finder)
+import heapq
+
+class RidePriorityQueue:
+    """
+    Implements a priority queue (min-heap) to allocate rides to vehicles based on the lowest cost.
+
+    Removed or re-prioritized vehicles leave lazy tombstones in the heap; once they
+    make up more than `compact_ratio` of it, the heap is rebuilt without them so
+    memory stays proportional to the number of live entries.
+
+    Attributes:
+        queue (list): The list maintaining the heap structure.
+        entry_finder (dict): Maps vehicle IDs to heap entries for quick updates.
+        counter (int): Unique sequence count to prevent comparison issues.
+        removed_count (int): Number of tombstones currently in the heap.
+        compact_ratio (float): Tombstone share of the heap that triggers compaction.
+
+    Example:
+        pq = RidePriorityQueue()
+        pq.add_vehicle("car_101", 12)
+        pq.add_vehicle("car_205", 7)
+        pq.get_best_vehicle()  # ('car_205', 7)
+        pq.remove_vehicle("car_205")
+        pq.get_best_vehicle()  # ('car_101', 12)
+
+        pq.build([("car_101", 12), ("car_205", 7)])  # reset and bulk-load in O(n)
+        pq.decrease_key("car_101", 3)
+        pq.get_best_vehicle()  # ('car_101', 3)
+    """
+
+    def __init__(self, compact_ratio=0.5):
+        self.queue = []
+        self.entry_finder = {}  # Maps vehicle_id -> entry
+        self.REMOVED = "<removed-vehicle>"
+        self.counter = 0
+        self.removed_count = 0
+        self.compact_ratio = compact_ratio
+
+    def add_vehicle(self, vehicle_id, priority):
+        """
+        Adds or updates a vehicle in the priority queue.
+
+        Args:
+            vehicle_id (str): Unique identifier of the vehicle.
+            priority (int or float): Cost/urgency value; lower = higher priority.
+        """
+        if vehicle_id in self.entry_finder:
+            self.remove_vehicle(vehicle_id)
+        entry = [priority, self.counter, vehicle_id]
+        self.entry_finder[vehicle_id] = entry
+        heapq.heappush(self.queue, entry)
+        self.counter += 1
+
+    def decrease_key(self, vehicle_id, priority):
+        """
+        Lowers a vehicle's priority value, adding the vehicle if it is not queued.
+
+        Args:
+            vehicle_id (str): Vehicle to update.
+            priority (int or float): New cost; ignored if not lower than the current one.
+
+        Returns:
+            bool: True if the queue was changed.
+        """
+        entry = self.entry_finder.get(vehicle_id)
+        if entry is not None and entry[0] <= priority:
+            return False
+        self.add_vehicle(vehicle_id, priority)
+        return True
+
+    def build(self, items):
+        """
+        Replaces the queue contents with the given vehicles in O(n) using heapify.
+
+        Args:
+            items (iterable): (vehicle_id, priority) pairs; a repeated vehicle_id keeps its last priority.
+        """
+        self.clear()
+        for vehicle_id, priority in items:
+            self.entry_finder[vehicle_id] = [priority, self.counter, vehicle_id]
+            self.counter += 1
+        self.queue = list(self.entry_finder.values())
+        heapq.heapify(self.queue)
+
+    def clear(self):
+        """Removes every vehicle from the queue."""
+        self.queue = []
+        self.entry_finder = {}
+        self.removed_count = 0
+        self.counter = 0
+
+    def remove_vehicle(self, vehicle_id):
+        """
+        Marks a vehicle as removed.
+
+        Args:
+            vehicle_id (str): Vehicle to remove from the queue.
+        """
+        entry = self.entry_finder.pop(vehicle_id)
+        entry[-1] = self.REMOVED
+        self.removed_count += 1
+        if self.removed_count > self.compact_ratio * len(self.queue):
+            self.compact()
+
+    def compact(self):
+        """Rebuilds the heap without tombstones."""
+        self.queue = [entry for entry in self.queue if entry[-1] is not self.REMOVED]
+        heapq.heapify(self.queue)
+        self.removed_count = 0
+
+    def get_best_vehicle(self):
+        """
+        Returns the vehicle with the highest priority (lowest cost).
+
+        Returns:
+            tuple: (vehicle_id, priority) or None if no vehicles available.
+        """
+        while self.queue:
+            priority, count, vehicle_id = heapq.heappop(self.queue)
+            if vehicle_id is not self.REMOVED:
+                del self.entry_finder[vehicle_id]
+                return vehicle_id, priority
+            self.removed_count -= 1
+        return None
+
+    def peek_best_vehicle(self):
+        """
+        Returns the vehicle with the lowest cost without removing it.
+
+        Returns:
+            tuple: (vehicle_id, priority) or None if the queue is empty.
+        """
+        while self.queue and self.queue[0][-1] is self.REMOVED:
+            heapq.heappop(self.queue)
+            self.removed_count -= 1
+        if not self.queue:
+            return None
+        priority, count, vehicle_id = self.queue[0]
+        return vehicle_id, priority
+
+    def __len__(self):
+        return len(self.entry_finder)
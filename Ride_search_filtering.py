@@ -1,82 +1,416 @@
-class Ride:
-    """
-    Represents a ride with key attributes for searching and sorting.
-
-    Attributes:
-        ride_id (str): Unique identifier for the ride.
-        location (str): The area where the ride originates or is available.
-        vehicle_type (str): Type of vehicle (e.g., Car, Bike, Bus).
-        driver_rating (float): Average rating of the driver (1.0 - 5.0).
-        date (str): Date of the ride in 'YYYY-MM-DD' format.
-
-    Example:
-        ride = Ride("r001", "Downtown", "Car", 4.5, "2025-04-22")
-    """
-    def __init__(self, ride_id, location, vehicle_type, driver_rating, date):
-        self.ride_id = ride_id
-        self.location = location
-        self.vehicle_type = vehicle_type
-        self.driver_rating = driver_rating
-        self.date = date  # can also be datetime.date for actual comparison
-    def __repr__(self):
-        return f"Ride({self.ride_id}, {self.vehicle_type}, Rating: {self.driver_rating}, Date: {self.date})"
-
-
-class RideSearchManager:
-    """
-    Manages rides with fast lookup by location, filtering by vehicle/rating,
-    and merge sorting by date or rating.
-
-    Example:
-        manager = RideSearchManager()
-        ride1 = Ride("r001", "Downtown", "Car", 4.5, "2025-04-22")
-        manager.add_ride(ride1)
-        results = manager.search(location='Downtown', vehicle_type='Car')
-        sorted_rides = manager.sort_rides(results, by='date')
-    """
-    def __init__(self):
-        self.rides_by_location = {}
-
-    def add_ride(self, ride):
-        """Adds a ride to the hash-indexed storage by location."""
-        if ride.location not in self.rides_by_location:
-            self.rides_by_location[ride.location] = []
-        self.rides_by_location[ride.location].append(ride)
-
-    def search(self, location, vehicle_type=None, min_rating=None):
-        """
-        Returns a filtered list of rides by location, vehicle type, and minimum driver rating.
-        """
-        results = self.rides_by_location.get(location, [])
-        if vehicle_type:
-            results = [r for r in results if r.vehicle_type.lower() == vehicle_type.lower()]
-        if min_rating:
-            results = [r for r in results if r.driver_rating >= min_rating]
-        return results
-
-    def sort_rides(self, rides, by='date'):
-        """Sorts the given list of rides using merge sort by 'date' or 'rating'."""
-        return self.merge_sort(rides, key=by)
-
-    def merge_sort(self, rides, key='date'):
-        """Recursive merge sort implementation for sorting rides."""
-        if len(rides) <= 1:
-            return rides
-
-        mid = len(rides) // 2
-        left = self.merge_sort(rides[:mid], key)
-        right = self.merge_sort(rides[mid:], key)
-        return self.merge(left, right, key)
-
-    def merge(self, left, right, key):
-        """Helper merge function used in merge sort."""
-        sorted_list = []
-        while left and right:
-            left_val = getattr(left[0], key)
-            right_val = getattr(right[0], key)
-            if left_val <= right_val:
-                sorted_list.append(left.pop(0))
-            else:
-                sorted_list.append(right.pop(0))
-        sorted_list.extend(left or right)
-        return sorted_list
+import bisect
+import heapq
+import itertools
+import threading
+from operator import attrgetter
+from columnar import RideColumns
+from vehicle_node import normalize_vehicle_type
+
+class Ride:
+    """
+    Represents a ride with key attributes for searching and sorting.
+
+    Attributes:
+        ride_id (str): Unique identifier for the ride.
+        location (str): The area where the ride originates or is available.
+        vehicle_type (str): Type of vehicle (e.g., Car, Bike, Bus).
+        driver_rating (float): Average rating of the driver (1.0 - 5.0).
+        date (str): Date of the ride in 'YYYY-MM-DD' format.
+
+    Example:
+        ride = Ride("r001", "Downtown", "Car", 4.5, "2025-04-22")
+    """
+    __slots__ = ("ride_id", "location", "vehicle_type", "driver_rating", "date")
+
+    def __init__(self, ride_id, location, vehicle_type, driver_rating, date):
+        self.ride_id = ride_id
+        self.location = location
+        self.vehicle_type = vehicle_type
+        self.driver_rating = driver_rating
+        self.date = date  # can also be datetime.date for actual comparison
+    def __repr__(self):
+        return f"Ride({self.ride_id}, {self.vehicle_type}, Rating: {self.driver_rating}, Date: {self.date})"
+
+
+class RideSearchManager:
+    """
+    Manages rides with fast lookup by location, vehicle type, date and rating,
+    and ordering by date or rating.
+
+    Every ride gets a sequence number (its position in `rides`). Equality filters
+    are answered from inverted indexes mapping a value to the ascending list of
+    sequence numbers having it, and `min_rating` from a rating-sorted index with
+    a bisect range query. The query planner drives the search from the smallest
+    candidate set and probes the others, so the cost follows the size of the
+    result rather than the number of stored rides.
+
+    Ordered searches either walk the date- or rating-sorted index and stop after
+    `offset + limit` matches, or select the first rows of the filtered set with a
+    heap, whichever touches fewer rides. `search_page` and `iter_search` resume
+    from a cursor, so paging through a large result never sorts all of it.
+
+    The date- and rating-sorted indexes are sorted lazily: add_ride only
+    appends to a pending list, and the next search that needs an order merges
+    the pending entries in with one sort, so bulk loading stays O(n log n).
+
+    Searches may run while another thread adds rides (one writer at a time). A
+    ride is indexed first and appended to `rides` last, and a search ignores
+    sequence numbers at or beyond the number of rides it saw when it started,
+    so it never returns a half-added ride. Merging pending entries is
+    serialized by `sort_lock` and publishes a new sorted list instead of
+    changing the old one, so walks already in progress are not disturbed.
+
+    Example:
+        manager = RideSearchManager()
+        ride1 = Ride("r001", "Downtown", "Car", 4.5, "2025-04-22")
+        manager.add_ride(ride1)
+        results = manager.search(location='Downtown', vehicle_type='Car')
+        results = manager.search(vehicle_type='car', min_rating=4.0)
+        latest = manager.search(location='Downtown', order_by='-date', limit=20)
+        sorted_rides = manager.sort_rides(results, by='date')
+    """
+    def __init__(self, columnar=False):
+        """
+        Args:
+            columnar (bool): Store rides in a RideColumns struct-of-arrays with
+                interned strings instead of keeping the Ride objects. Results are
+                then read-only RideView objects.
+        """
+        self.rides = RideColumns() if columnar else []
+        self.location_index = {}  # location -> [seq, ...]
+        self.type_index = {}  # normalized vehicle type -> [seq, ...]
+        self.date_index = {}  # 'YYYY-MM-DD' -> [seq, ...]
+        self.date_order = []  # sorted [(date sort key, seq), ...]
+        self.rating_index = []  # sorted [(driver_rating, seq), ...]
+        self.date_pending = []  # date_order entries not sorted in yet
+        self.rating_pending = []  # rating_index entries not sorted in yet
+        self.sort_lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.rides)
+
+    def add_ride(self, ride):
+        """
+        Adds a ride to the storage and all of its indexes.
+
+        Concurrent searches are safe, but callers adding from several threads
+        must serialize add_ride themselves.
+        """
+        seq = len(self.rides)
+        self.location_index.setdefault(ride.location, []).append(seq)
+        self.type_index.setdefault(normalize_vehicle_type(ride.vehicle_type), []).append(seq)
+        self.date_index.setdefault(date_key(ride.date), []).append(seq)
+        self.date_pending.append((date_sort_key(ride.date), seq))
+        self.rating_pending.append((ride.driver_rating, seq))
+        self.rides.append(ride)  # publishes the ride to searches
+
+    def search(self, location=None, vehicle_type=None, min_rating=None, date=None,
+               order_by=None, limit=None, offset=0, cursor=None):
+        """
+        Returns the rides matching every given filter.
+
+        Args:
+            location (str, optional): Exact pickup area.
+            vehicle_type (str, optional): Vehicle type, case-insensitive.
+            min_rating (float, optional): Lowest accepted driver rating.
+            date (str or date, optional): Day of the ride.
+            order_by (str, optional): 'date' or 'rating', prefixed with '-' for
+                descending order. Defaults to the order the rides were added.
+            limit (int, optional): Maximum number of rides to return.
+            offset (int, optional): Number of leading matches to skip.
+            cursor (optional): Only return rides after this position, as
+                returned by search_page.
+
+        Returns:
+            list: Matching Ride objects.
+
+        Example:
+            >>> manager.search(vehicle_type='car', order_by='-rating', limit=10)
+        """
+        filters = self._filters(location, vehicle_type, min_rating, date)
+        if filters is None:
+            return []
+        return [self.rides[seq] for seq in self._select(filters, order_by, limit, offset, cursor)]
+
+    def search_page(self, location=None, vehicle_type=None, min_rating=None, date=None,
+                    order_by=None, limit=20, cursor=None):
+        """
+        Returns one page of matching rides and the cursor of the next page.
+
+        Args:
+            location, vehicle_type, min_rating, date, order_by: As for search.
+            limit (int): Page size.
+            cursor (optional): Cursor returned with the previous page, or None
+                for the first page.
+
+        Returns:
+            tuple: (rides, next_cursor); next_cursor is None on the last page.
+
+        Example:
+            >>> page, cursor = manager.search_page(location='Downtown', order_by='-date')
+            >>> while cursor is not None:
+            ...     page, cursor = manager.search_page(location='Downtown', order_by='-date', cursor=cursor)
+        """
+        filters = self._filters(location, vehicle_type, min_rating, date)
+        if filters is None:
+            return [], None
+        seqs = self._select(filters, order_by, limit + 1, 0, cursor)
+        next_cursor = None
+        if len(seqs) > limit:
+            seqs = seqs[:limit]
+            next_cursor = self._cursor(order_by, seqs[-1])
+        return [self.rides[seq] for seq in seqs], next_cursor
+
+    def iter_search(self, location=None, vehicle_type=None, min_rating=None, date=None,
+                    order_by=None, cursor=None):
+        """
+        Lazily yields the rides matching every given filter.
+
+        Rides are produced one at a time from the indexes, so stopping early
+        costs only the rides consumed and memory stays constant.
+
+        Args:
+            location, vehicle_type, min_rating, date, order_by, cursor: As for search.
+
+        Yields:
+            Ride: The next matching ride.
+        """
+        filters = self._filters(location, vehicle_type, min_rating, date)
+        if filters is None:
+            return
+        if order_by is None:
+            seqs = self._scan(filters, cursor)
+        else:
+            field, reverse = _parse_order(order_by)
+            seqs = self._walk(filters, field, reverse, cursor)
+        for seq in seqs:
+            yield self.rides[seq]
+
+    def sort_rides(self, rides, by='date'):
+        """
+        Sorts the given rides by 'date' or 'rating' in O(n log n).
+
+        The sort key is extracted once per ride and equal keys keep their order.
+
+        Args:
+            rides (list): Ride objects to sort.
+            by (str): 'date' or 'rating', prefixed with '-' for descending order.
+
+        Returns:
+            list: A new sorted list.
+        """
+        field, reverse = _parse_order(by)
+        return sorted(rides, key=ORDER_KEYS[field], reverse=reverse)
+
+    def merge_sort(self, rides, key='date'):
+        """Stable merge sort of rides by 'date' or 'rating', extracting each key once."""
+        key_func = ORDER_KEYS[_parse_order(key)[0]]
+        decorated = [(key_func(ride), ride) for ride in rides]
+        width = 1
+        while width < len(decorated):
+            merged = []
+            for start in range(0, len(decorated), 2 * width):
+                merged.extend(self.merge(decorated[start:start + width],
+                                         decorated[start + width:start + 2 * width]))
+            decorated = merged
+            width *= 2
+        return [ride for _, ride in decorated]
+
+    def merge(self, left, right):
+        """Merges two sorted lists of (key, ride) pairs in linear time."""
+        merged = []
+        i = j = 0
+        while i < len(left) and j < len(right):
+            if left[i][0] <= right[j][0]:
+                merged.append(left[i])
+                i += 1
+            else:
+                merged.append(right[j])
+                j += 1
+        merged.extend(left[i:])
+        merged.extend(right[j:])
+        return merged
+
+    def _filters(self, location, vehicle_type, min_rating, date):
+        """
+        Resolves the search filters against the indexes.
+
+        Returns:
+            tuple: (postings, min_rating, rating_start, count) where postings are
+            the posting lists of the equality filters sorted by length and count
+            is the number of rides the search sees, or None when one of the
+            filters matches no ride.
+        """
+        count = len(self.rides)  # read before the indexes, which may run ahead of it
+        postings = []
+        for index, value in ((self.location_index, location),
+                             (self.type_index, normalize_vehicle_type(vehicle_type)),
+                             (self.date_index, date_key(date))):
+            if value is not None:
+                posting = index.get(value)
+                if not posting:
+                    return None
+                postings.append(posting)
+        postings.sort(key=len)
+
+        rating_start = None
+        if min_rating is not None:
+            self._sort_pending()
+            rating_start = bisect.bisect_left(self.rating_index, (min_rating, -1))
+            if rating_start == len(self.rating_index):
+                return None
+        return postings, min_rating, rating_start, count
+
+    def _estimate(self, filters):
+        """Returns the size of the smallest candidate set for the filters."""
+        postings, _, rating_start, count = filters
+        sizes = [len(posting) for posting in postings[:1]]
+        if rating_start is not None:
+            sizes.append(len(self.rating_index) - rating_start)
+        return min(sizes) if sizes else count
+
+    def _plan(self, filters):
+        """Returns the ascending sequence numbers of the rides matching the filters."""
+        return list(self._scan(filters))
+
+    def _scan(self, filters, cursor=None):
+        """Yields the matching sequence numbers in insertion order, after `cursor`."""
+        postings, min_rating, rating_start, count = filters
+        after = -1 if cursor is None else cursor
+        if not postings and rating_start is None:
+            yield from range(after + 1, count)
+            return
+
+        if rating_start is not None and (not postings
+                                         or len(self.rating_index) - rating_start < len(postings[0])):
+            # The rating range is the smallest candidate set; inserts since
+            # _filters may have shifted it, so the ratings are checked again
+            candidates = sorted(seq for rating, seq in self.rating_index[rating_start:]
+                                if rating >= min_rating and seq < count)
+            min_rating = None
+        else:
+            candidates = postings[0]
+            postings = postings[1:]
+        for position in range(bisect.bisect_right(candidates, after), len(candidates)):
+            seq = candidates[position]
+            if seq >= count:
+                return
+            if self._matches(seq, postings, min_rating):
+                yield seq
+
+    def _select(self, filters, order_by, limit, offset, cursor):
+        """Returns the sequence numbers of one page of matches in the requested order."""
+        stop = None if limit is None else offset + limit
+        if order_by is None:
+            return list(itertools.islice(self._scan(filters, cursor), offset, stop))
+
+        field, reverse = _parse_order(order_by)
+        if limit is not None:
+            candidates = self._estimate(filters)
+            # Walking the sorted index visits about stop * n / candidates entries
+            if candidates and stop * filters[3] <= candidates * candidates:
+                return list(itertools.islice(self._walk(filters, field, reverse, cursor), offset, stop))
+
+        ranked = ((self._sort_key(field, seq), seq) for seq in self._scan(filters))
+        if cursor is not None:
+            ranked = (entry for entry in ranked if (entry < cursor if reverse else entry > cursor))
+        if limit is not None:
+            pick = heapq.nlargest if reverse else heapq.nsmallest
+            ranked = pick(stop, ranked)
+        else:
+            ranked = sorted(ranked, reverse=reverse)
+        return [seq for _, seq in ranked[offset:]]
+
+    def _walk(self, filters, field, reverse, cursor=None):
+        """Yields the matching sequence numbers by walking a sorted index from `cursor`."""
+        postings, min_rating, rating_start, count = filters
+        self._sort_pending()
+        index = self.date_order
+        floor = None
+        if field == 'rating':
+            index = self.rating_index
+            # The rating range is a contiguous run at the top of the rating index
+            floor, min_rating = min_rating, None
+        last = cursor  # the walk resumes after this entry
+        if floor is not None and not reverse and (last is None or last < (floor, -1)):
+            last = (floor, -1)
+        if last is None:
+            position = len(index) - 1 if reverse else 0
+        elif reverse:
+            position = bisect.bisect_left(index, last) - 1
+        else:
+            position = bisect.bisect_right(index, last)
+        step = -1 if reverse else 1
+        while 0 <= position < len(index):
+            entry = index[position]
+            if floor is not None and entry[0] < floor:
+                return
+            position += step
+            seq = entry[1]
+            if seq < count and self._matches(seq, postings, min_rating):
+                yield seq
+
+    def _sort_pending(self):
+        """Merges the pending entries into new sorted date and rating indexes."""
+        with self.sort_lock:
+            for pending, name in ((self.date_pending, "date_order"), (self.rating_pending, "rating_index")):
+                added = len(pending)  # the writer may append more meanwhile
+                if added:
+                    merged = getattr(self, name) + pending[:added]
+                    merged.sort()  # timsort merges the sorted run with the new entries
+                    setattr(self, name, merged)
+                    del pending[:added]
+
+    def _matches(self, seq, postings, min_rating):
+        if min_rating is not None and self.rides[seq].driver_rating < min_rating:
+            return False
+        return all(_contains(posting, seq) for posting in postings)
+
+    def _sort_key(self, field, seq):
+        return ORDER_KEYS[field](self.rides[seq])
+
+    def _cursor(self, order_by, seq):
+        """Position of a ride in the given order, used to resume a search after it."""
+        if order_by is None:
+            return seq
+        return (self._sort_key(_parse_order(order_by)[0], seq), seq)
+
+
+def date_key(date):
+    """
+    Returns the 'YYYY-MM-DD' index key for a ride date, or None.
+
+    Args:
+        date (str, datetime.date or datetime.datetime): The ride date.
+    """
+    if date is None:
+        return None
+    if hasattr(date, "isoformat"):
+        return date.isoformat()[:10]
+    return str(date)[:10]
+
+
+def date_sort_key(date):
+    """Returns a key that orders ride dates given as strings, dates or datetimes."""
+    return date.isoformat() if hasattr(date, "isoformat") else str(date)
+
+
+ORDER_KEYS = {
+    'date': lambda ride: date_sort_key(ride.date),
+    'rating': attrgetter('driver_rating'),
+}
+
+
+def _parse_order(order_by):
+    """Splits '-rating' into ('rating', True)."""
+    reverse = order_by.startswith('-')
+    field = order_by.lstrip('-')
+    if field not in ORDER_KEYS:
+        raise ValueError(f"Unknown sort field: {order_by!r}")
+    return field, reverse
+
+
+def _contains(posting, seq):
+    """Membership test on an ascending posting list."""
+    i = bisect.bisect_left(posting, seq)
+    return i < len(posting) and posting[i] == seq
@@ -0,0 +1,120 @@
+import math
+
+
+def solve_assignment(cost, method="hungarian"):
+    """
+    Matches rows (ride requests) to columns (vehicles) minimizing the total cost.
+
+    Each row is matched to at most one column and vice versa. Entries set to
+    math.inf mark pairs that must not be matched; rows without any feasible
+    column are left unmatched.
+
+    Args:
+        cost (list or numpy.ndarray): m x n cost matrix.
+        method (str): 'hungarian' for the optimal O(m^2 n) solution, or 'greedy'
+            for cheapest-pair-first matching followed by a pairwise swap repair.
+
+    Returns:
+        list: (row, col) pairs of the chosen matching.
+
+    Example:
+        solve_assignment([[4, 1], [2, 8]])  # [(0, 1), (1, 0)]
+    """
+    if hasattr(cost, "tolist"):
+        cost = cost.tolist()
+    if not cost or not cost[0]:
+        return []
+    if method == "greedy":
+        return _greedy_with_repair(cost)
+    if method != "hungarian":
+        raise ValueError(f"Unknown assignment method: {method}")
+
+    rows, cols = len(cost), len(cost[0])
+    if rows > cols:
+        transposed = [[cost[r][c] for r in range(rows)] for c in range(cols)]
+        return sorted((r, c) for c, r in _hungarian(transposed))
+    return _hungarian(cost)
+
+
+def _hungarian(cost):
+    """Kuhn-Munkres with potentials for a rectangular matrix with rows <= cols."""
+    finite = [value for row in cost for value in row if value != math.inf]
+    if not finite:
+        return []
+    # Infeasible pairs get a cost larger than any complete feasible matching
+    big = (max(finite) - min(min(finite), 0) + 1) * (len(cost) + 1)
+    matrix = [[big if value == math.inf else value for value in row] for row in cost]
+
+    n, m = len(matrix), len(matrix[0])
+    u = [0.0] * (n + 1)
+    v = [0.0] * (m + 1)
+    owner = [0] * (m + 1)  # owner[col] = row matched to col (1-based, 0 = free)
+    way = [0] * (m + 1)
+
+    for i in range(1, n + 1):
+        owner[0] = i
+        j0 = 0
+        min_slack = [math.inf] * (m + 1)
+        used = [False] * (m + 1)
+        while True:
+            used[j0] = True
+            i0 = owner[j0]
+            row = matrix[i0 - 1]
+            u_i0 = u[i0]
+            delta = math.inf
+            j1 = 0
+            for j in range(1, m + 1):
+                if not used[j]:
+                    slack = row[j - 1] - u_i0 - v[j]
+                    if slack < min_slack[j]:
+                        min_slack[j] = slack
+                        way[j] = j0
+                    if min_slack[j] < delta:
+                        delta = min_slack[j]
+                        j1 = j
+            for j in range(m + 1):
+                if used[j]:
+                    u[owner[j]] += delta
+                    v[j] -= delta
+                else:
+                    min_slack[j] -= delta
+            j0 = j1
+            if owner[j0] == 0:
+                break
+        while j0:
+            j1 = way[j0]
+            owner[j0] = owner[j1]
+            j0 = j1
+
+    return sorted(
+        (owner[j] - 1, j - 1) for j in range(1, m + 1)
+        if owner[j] and cost[owner[j] - 1][j - 1] != math.inf
+    )
+
+
+def _greedy_with_repair(cost, max_passes=3):
+    """Cheapest-pair-first matching improved by swapping partners between matched rows."""
+    edges = sorted(
+        (value, r, c) for r, row in enumerate(cost) for c, value in enumerate(row) if value != math.inf
+    )
+    row_to_col = {}
+    taken = set()
+    for value, r, c in edges:
+        if r not in row_to_col and c not in taken:
+            row_to_col[r] = c
+            taken.add(c)
+
+    matched = list(row_to_col)
+    for _ in range(max_passes):
+        improved = False
+        for a in range(len(matched)):
+            for b in range(a + 1, len(matched)):
+                ra, rb = matched[a], matched[b]
+                ca, cb = row_to_col[ra], row_to_col[rb]
+                if cost[ra][cb] + cost[rb][ca] < cost[ra][ca] + cost[rb][cb]:
+                    row_to_col[ra], row_to_col[rb] = cb, ca
+                    improved = True
+        if not improved:
+            break
+
+    return sorted(row_to_col.items())
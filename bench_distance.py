@@ -0,0 +1,69 @@
+"""
+Benchmark: scalar vs vectorized distance computation for dispatch.
+
+Measures how many vehicle distances per second SystemManager.calculate_distance
+(one call per vehicle), SystemManager.calculate_distances (one haversine_many
+call over packed coordinates) and FleetManager.distances_from (the same kernel
+fed from the fleet's coordinate array, as batch dispatch does) can compute.
+The speedup column compares the fleet path with the scalar one.
+
+Usage:
+    python bench_distance.py
+"""
+import contextlib
+import os
+import random
+import timeit
+from array import array
+from fleet_manager import FleetManager
+from geo_utils import np
+from systemmanager import SystemManager
+
+PICKUP = (25.0773, 55.1344)
+SIZES = (1_000, 10_000, 100_000)
+
+
+def make_fleet(n, seed=42):
+    """Returns n random Dubai-area coordinates as a flat float64 buffer."""
+    rng = random.Random(seed)
+    coords = array("d")
+    for _ in range(n):
+        coords.append(24.9 + rng.random() * 0.5)
+        coords.append(55.0 + rng.random() * 0.5)
+    return coords
+
+
+def make_fleet_manager(pairs):
+    """Returns a FleetManager with one available car at each position, and the vehicle ids."""
+    fleet = FleetManager()
+    ids = [f"V{i}" for i in range(len(pairs))]
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        for vehicle_id, point in zip(ids, pairs):
+            fleet.add_vehicle(vehicle_id, "car", "available", "Spot", point, vehicle_id)
+    return fleet, ids
+
+
+def best_of(func, repeat=5):
+    """Returns the fastest wall-clock time in seconds of a few runs."""
+    return min(timeit.repeat(func, number=1, repeat=repeat))
+
+
+def main():
+    if np is None:
+        print("NumPy is not installed: haversine_many runs the pure-Python fallback.")
+    print(f"{'vehicles':>10} {'scalar/s':>14} {'vectorized/s':>14} {'fleet/s':>14} {'speedup':>9}")
+    for n in SIZES:
+        coords = make_fleet(n)
+        pairs = list(zip(coords[0::2], coords[1::2]))
+        packed = np.frombuffer(coords, dtype=np.float64).reshape(-1, 2) if np is not None else coords
+        fleet, ids = make_fleet_manager(pairs)
+
+        scalar = best_of(lambda: [SystemManager.calculate_distance(PICKUP, p) for p in pairs])
+        vectorized = best_of(lambda: SystemManager.calculate_distances(PICKUP, packed))
+        gathered = best_of(lambda: fleet.distances_from(PICKUP, ids))
+        print(f"{n:>10} {n / scalar:>14,.0f} {n / vectorized:>14,.0f} {n / gathered:>14,.0f} "
+              f"{scalar / gathered:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
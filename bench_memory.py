@@ -0,0 +1,88 @@
+"""
+Benchmark: bytes per record for dict-backed, slotted and columnar records.
+
+Builds N records of each model class and measures the memory they hold with
+tracemalloc. "dict" is the same class without __slots__ (how the models were
+stored before), "slots" is the current class and "columnar" stores the
+records in the struct-of-arrays stores from columnar.py.
+
+Usage:
+    python bench_memory.py
+"""
+import datetime
+import random
+import tracemalloc
+from AVLtree import AVLNode
+from columnar import RideColumns, RideLogColumns
+from ride_history import RideLog
+from ride_request import RideRequest
+from Ride_search_filtering import Ride
+from smarttraffic import TrafficVehicle
+from user_manager import User
+from vehicle_node import Vehicle
+
+N = 100_000
+START = datetime.datetime(2025, 4, 22)
+LOCATIONS = ("Dubai Mall", "Dubai Marina", "JBR", "Burj Khalifa", "Mall of the Emirates")
+TYPES = ("car", "bike", "bus")
+
+
+def dict_backed(cls):
+    """Returns a copy of a slotted class whose instances use a __dict__."""
+    return type(cls.__name__ + "Dict", (), {"__init__": cls.__init__})
+
+
+def make_args(rng):
+    """Returns constructor arguments for each benchmarked class, for one record."""
+    i = rng.randrange(10**9)
+    location = rng.choice(LOCATIONS)
+    vehicle_type = rng.choice(TYPES)
+    geo = (24.9 + rng.random() * 0.5, 55.0 + rng.random() * 0.5)
+    return {
+        Vehicle: (f"V{i}", vehicle_type, "available", location, geo, i),
+        RideRequest: (f"U{i}", location, geo, rng.choice(LOCATIONS), geo, vehicle_type),
+        RideLog: (f"R{i}", f"U{i}", f"V{i}", location, rng.randint(1, 5), vehicle_type, location, geo, geo),
+        # A distinct timestamp per ride, as SystemManager.end_ride records them
+        Ride: (f"R{i}", location, vehicle_type, rng.randint(1, 5), START + datetime.timedelta(seconds=i)),
+        User: (f"U{i}", "Ali", "driver"),
+        TrafficVehicle: (f"V{i}", rng.randint(0, 30)),
+        AVLNode: (None, rng.random(), i),
+    }
+
+
+def measure(build):
+    """Returns the bytes per record still allocated after build() returns its records."""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    records = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del records
+    return (after - before) / N
+
+
+def main():
+    rng = random.Random(42)
+    rows = [make_args(rng) for _ in range(N)]
+
+    print(f"{'class':>16} {'dict B/rec':>11} {'slots B/rec':>12} {'columnar B/rec':>15}")
+    for cls in (Vehicle, RideRequest, RideLog, Ride, User, TrafficVehicle, AVLNode):
+        plain = dict_backed(cls)
+        dict_bytes = measure(lambda: [plain(*row[cls]) for row in rows])
+        slot_bytes = measure(lambda: [cls(*row[cls]) for row in rows])
+        columnar = ""
+        if cls in (Ride, RideLog):
+            store_cls = RideColumns if cls is Ride else RideLogColumns
+
+            def build_store():
+                store = store_cls()
+                for row in rows:
+                    store.append(cls(*row[cls]))
+                return store
+
+            columnar = f"{measure(build_store):,.0f}"
+        print(f"{cls.__name__:>16} {dict_bytes:>11,.0f} {slot_bytes:>12,.0f} {columnar:>15}")
+
+
+if __name__ == "__main__":
+    main()
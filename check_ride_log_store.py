@@ -0,0 +1,84 @@
+"""
+Check: RideLogStore round-trips every field and survives a reopen.
+
+Writes rides with short and over-long text fields (longer than the fixed
+record slots), integer ids and missing coordinates across several segments,
+then reads them back, reopens the store and rebuilds a RideHistoryManager
+from it. Two users whose ids only differ after the first 32 bytes must stay
+two users.
+
+Usage:
+    python check_ride_log_store.py
+"""
+import sys
+import tempfile
+from ride_history import RideHistoryManager, RideLog
+from ride_log_store import RideLogStore
+
+PREFIX = "user-" + "x" * 40  # longer than the 32-byte user_id slot
+
+
+def make_rides():
+    """Returns a mix of rides exercising every field encoding."""
+    rides = []
+    for i in range(50):
+        rides.append(RideLog(
+            ride_id=f"ride-{i}",
+            user_id=f"{PREFIX}-{i % 2}" if i % 3 else i % 7,
+            vehicle_id=f"V{i}" if i % 2 else i,
+            location="Mall of the Emirates, Sheikh Zayed Road, Al Barsha 1" if i % 4 == 0 else "JBR",
+            rating=float(i % 5 + 1),
+            vehicle_type="car" if i % 5 else None,
+            pickup="Dubai International Financial Centre, Gate Village 3" if i % 2 else "مرسى دبي",
+            pickup_geo=(25.07, 55.13) if i % 3 else None,
+            location_geo=(25.19, 55.27),
+            destination="Dubai Marina Mall, Sheikh Zayed Road, Dubai Marina" if i % 3 == 1 else None,
+            destination_geo=(25.08, 55.14) if i % 2 else None,
+        ))
+    return rides
+
+
+def fields(ride):
+    return (ride.ride_id, ride.user_id, ride.vehicle_id, ride.location, ride.rating,
+            ride.vehicle_type, ride.pickup, ride.pickup_geo, ride.location_geo,
+            ride.destination, ride.destination_geo)
+
+
+def main():
+    problems = []
+    rides = make_rides()
+    expected = [fields(ride) for ride in rides]
+    with tempfile.TemporaryDirectory() as directory:
+        store = RideLogStore(directory, segment_records=16)
+        for ride in rides:
+            store.append(ride)
+        if [fields(ride) for ride in store.records()] != expected:
+            problems.append("records() differs from what was written")
+        if fields(store.get(-1)) != expected[-1]:
+            problems.append("get(-1) differs from the last ride written")
+        store.close()
+
+        store = RideLogStore(directory, segment_records=16)
+        if [fields(ride) for ride in store.records()] != expected:
+            problems.append("records() differs after reopening")
+        if [fields(ride) for ride in store.records(reverse=True)] != expected[::-1]:
+            problems.append("records(reverse=True) differs after reopening")
+        history = RideHistoryManager(store=store)
+        for user_id in (f"{PREFIX}-0", f"{PREFIX}-1"):
+            got = [ride.ride_id for ride in history.view_history(user_id)]
+            want = [ride.ride_id for ride in reversed(rides) if ride.user_id == user_id]
+            if got != want:
+                problems.append(f"history of {user_id[-8:]} after rebuild: {got} != {want}")
+        last = history.rebook_last_ride(f"{PREFIX}-1")
+        if last is None or last.pickup != rides[-1].pickup:
+            problems.append("rebooked pickup was not restored in full")
+        history.close()
+
+    for problem in problems:
+        print(f"FAIL {problem}")
+    print("ride log store round-trip ok" if not problems else "FAILED")
+    sys.exit(1 if problems else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,320 @@
+import datetime
+from array import array
+
+NAN = float("nan")
+EPOCH = datetime.datetime(1970, 1, 1)
+MICROSECOND = datetime.timedelta(microseconds=1)
+
+# Kinds of value held in RideColumns.dates
+_NO_DATE = 0
+_DATE_TEXT = 1  # StringPool code of a date string
+_DATE_DAY = 2  # date ordinal
+_DATE_TIME = 3  # naive datetime as microseconds since EPOCH
+_DATE_OTHER = 4  # anything else, kept in date_objects
+
+
+class StringPool:
+    """
+    Interns repeated strings (locations, vehicle types) as small integer codes.
+
+    Example:
+        pool = StringPool()
+        code = pool.code("Dubai Mall")
+        pool.strings[code]  # 'Dubai Mall'
+    """
+    __slots__ = ("strings", "codes")
+
+    def __init__(self):
+        self.strings = [None]  # code 0 is None
+        self.codes = {None: 0}
+
+    def __len__(self):
+        return len(self.strings)
+
+    def code(self, value):
+        """Returns the code of a string, adding it to the pool if needed."""
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.strings)
+            self.strings.append(value)
+        return code
+
+
+class RideColumns:
+    """
+    Struct-of-arrays store for Ride records (see Ride_search_filtering.Ride).
+
+    Ratings live in a float64 array and locations and vehicle types are
+    interned into StringPool codes held in uint32 arrays. Dates are numeric:
+    datetimes (usually unique per ride) as int64 microseconds and dates as
+    ordinals, with a one-byte kind so they come back with their original type;
+    only date strings are interned. A stored ride therefore costs a few array
+    slots instead of a Python object. Indexing returns a RideView
+    that reads the columns on attribute access, so code written against Ride
+    keeps working.
+
+    A row is complete before it is counted in len(), so readers on other
+    threads can iterate while one writer appends.
+
+    Example:
+        rides = RideColumns()
+        rides.append(Ride("r001", "Downtown", "Car", 4.5, "2025-04-22"))
+        rides[0].driver_rating  # 4.5
+    """
+
+    def __init__(self, strings=None):
+        """
+        Args:
+            strings (StringPool, optional): Pool to share with other column stores.
+        """
+        self.strings = strings if strings is not None else StringPool()
+        self.ride_ids = []
+        self.locations = array("I")
+        self.vehicle_types = array("I")
+        self.driver_ratings = array("d")
+        self.dates = array("q")
+        self.date_kinds = array("B")
+        self.date_objects = {}  # index -> date of an unsupported kind (e.g. aware datetime)
+
+    def __len__(self):
+        return len(self.ride_ids)
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self.ride_ids)
+        if not 0 <= index < len(self.ride_ids):
+            raise IndexError("ride index out of range")
+        return RideView(self, index)
+
+    def __iter__(self):
+        for index in range(len(self.ride_ids)):
+            yield RideView(self, index)
+
+    def __reversed__(self):
+        for index in range(len(self.ride_ids) - 1, -1, -1):
+            yield RideView(self, index)
+
+    def append(self, ride):
+        """Stores a ride and returns its index."""
+        code = self.strings.code
+        self.locations.append(code(ride.location))
+        self.vehicle_types.append(code(ride.vehicle_type))
+        self.driver_ratings.append(ride.driver_rating)
+        self._append_date(ride.date)
+        self.ride_ids.append(ride.ride_id)  # last: the length of ride_ids publishes the row
+        return len(self.ride_ids) - 1
+
+    def date_at(self, index):
+        """Returns the date stored at a row, with the type it was stored with."""
+        kind = self.date_kinds[index]
+        value = self.dates[index]
+        if kind == _DATE_TIME:
+            return EPOCH + value * MICROSECOND
+        if kind == _DATE_DAY:
+            return datetime.date.fromordinal(value)
+        if kind == _DATE_TEXT:
+            return self.strings.strings[value]
+        if kind == _DATE_OTHER:
+            return self.date_objects[index]
+        return None
+
+    def _append_date(self, date):
+        if date is None:
+            kind, value = _NO_DATE, 0
+        elif isinstance(date, datetime.datetime):
+            if date.tzinfo is None:
+                kind, value = _DATE_TIME, (date - EPOCH) // MICROSECOND
+            else:
+                kind, value = _DATE_OTHER, 0
+                self.date_objects[len(self.dates)] = date
+        elif isinstance(date, datetime.date):
+            kind, value = _DATE_DAY, date.toordinal()
+        elif isinstance(date, str):
+            kind, value = _DATE_TEXT, self.strings.code(date)
+        else:
+            kind, value = _DATE_OTHER, 0
+            self.date_objects[len(self.dates)] = date
+        self.date_kinds.append(kind)
+        self.dates.append(value)
+
+
+class RideView:
+    """Read-only Ride backed by one row of a RideColumns store."""
+    __slots__ = ("_columns", "_index")
+
+    def __init__(self, columns, index):
+        self._columns = columns
+        self._index = index
+
+    @property
+    def ride_id(self):
+        return self._columns.ride_ids[self._index]
+
+    @property
+    def location(self):
+        columns = self._columns
+        return columns.strings.strings[columns.locations[self._index]]
+
+    @property
+    def vehicle_type(self):
+        columns = self._columns
+        return columns.strings.strings[columns.vehicle_types[self._index]]
+
+    @property
+    def driver_rating(self):
+        return self._columns.driver_ratings[self._index]
+
+    @property
+    def date(self):
+        return self._columns.date_at(self._index)
+
+    def __eq__(self, other):
+        return (isinstance(other, RideView) and other._columns is self._columns
+                and other._index == self._index)
+
+    def __hash__(self):
+        return hash((id(self._columns), self._index))
+
+    def __repr__(self):
+        return f"Ride({self.ride_id}, {self.vehicle_type}, Rating: {self.driver_rating}, Date: {self.date})"
+
+
+class RideLogColumns:
+    """
+    Struct-of-arrays store for RideLog records (see ride_history.RideLog).
+
+    Ratings and coordinates are float64 arrays (NaN marks missing coordinates);
+    locations, pickups, destinations and vehicle types are interned. Indexing returns a
+    RideLogView with the RideLog attributes.
+
+    Example:
+        logs = RideLogColumns()
+        logs.append(RideLog("r1", "U1", "V001", "Dubai Mall", 5.0))
+        logs[-1].location  # 'Dubai Mall'
+    """
+
+    def __init__(self, strings=None):
+        """
+        Args:
+            strings (StringPool, optional): Pool to share with other column stores.
+        """
+        self.strings = strings if strings is not None else StringPool()
+        self.ride_ids = []
+        self.user_ids = []
+        self.vehicle_ids = []
+        self.locations = array("I")
+        self.ratings = array("d")
+        self.vehicle_types = array("I")
+        self.pickups = array("I")
+        self.pickup_geos = array("d")  # lat, lon pairs
+        self.location_geos = array("d")  # lat, lon pairs
+        self.destinations = array("I")
+        self.destination_geos = array("d")  # lat, lon pairs
+
+    def __len__(self):
+        return len(self.ride_ids)
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self.ride_ids)
+        if not 0 <= index < len(self.ride_ids):
+            raise IndexError("ride log index out of range")
+        return RideLogView(self, index)
+
+    def __iter__(self):
+        for index in range(len(self.ride_ids)):
+            yield RideLogView(self, index)
+
+    def __reversed__(self):
+        for index in range(len(self.ride_ids) - 1, -1, -1):
+            yield RideLogView(self, index)
+
+    def append(self, ride_log):
+        """Stores a ride log and returns its view."""
+        code = self.strings.code
+        self.user_ids.append(ride_log.user_id)
+        self.vehicle_ids.append(ride_log.vehicle_id)
+        self.locations.append(code(ride_log.location))
+        self.ratings.append(ride_log.rating)
+        self.vehicle_types.append(code(ride_log.vehicle_type))
+        self.pickups.append(code(ride_log.pickup))
+        self.pickup_geos.extend(ride_log.pickup_geo or (NAN, NAN))
+        self.location_geos.extend(ride_log.location_geo or (NAN, NAN))
+        self.destinations.append(code(ride_log.destination))
+        self.destination_geos.extend(ride_log.destination_geo or (NAN, NAN))
+        self.ride_ids.append(ride_log.ride_id)  # last: the length of ride_ids publishes the row
+        return RideLogView(self, len(self.ride_ids) - 1)
+
+
+class RideLogView:
+    """Read-only RideLog backed by one row of a RideLogColumns store."""
+    __slots__ = ("_columns", "_index")
+
+    def __init__(self, columns, index):
+        self._columns = columns
+        self._index = index
+
+    @property
+    def ride_id(self):
+        return self._columns.ride_ids[self._index]
+
+    @property
+    def user_id(self):
+        return self._columns.user_ids[self._index]
+
+    @property
+    def vehicle_id(self):
+        return self._columns.vehicle_ids[self._index]
+
+    @property
+    def location(self):
+        columns = self._columns
+        return columns.strings.strings[columns.locations[self._index]]
+
+    @property
+    def rating(self):
+        return self._columns.ratings[self._index]
+
+    @property
+    def vehicle_type(self):
+        columns = self._columns
+        return columns.strings.strings[columns.vehicle_types[self._index]]
+
+    @property
+    def pickup(self):
+        columns = self._columns
+        return columns.strings.strings[columns.pickups[self._index]]
+
+    @property
+    def pickup_geo(self):
+        return _pair(self._columns.pickup_geos, self._index)
+
+    @property
+    def location_geo(self):
+        return _pair(self._columns.location_geos, self._index)
+
+    @property
+    def destination(self):
+        columns = self._columns
+        return columns.strings.strings[columns.destinations[self._index]]
+
+    @property
+    def destination_geo(self):
+        return _pair(self._columns.destination_geos, self._index)
+
+    def __eq__(self, other):
+        return (isinstance(other, RideLogView) and other._columns is self._columns
+                and other._index == self._index)
+
+    def __hash__(self):
+        return hash((id(self._columns), self._index))
+
+    def __repr__(self):
+        return f"RideLog({self.ride_id}, {self.user_id}, {self.location}, Rating: {self.rating})"
+
+
+def _pair(values, index):
+    lat = values[2 * index]
+    if lat != lat:  # NaN marks a missing coordinate
+        return None
+    return (lat, values[2 * index + 1])
@@ -1,159 +1,452 @@
-from vehicle_node import Vehicle
-class FleetManager:
-    """
-    A linked list-based fleet manager to handle ride-sharing vehicles.
-    """
-
-    def __init__(self):
-        """
-        Initialize an empty fleet.
-
-        Example:
-            >>> fleet = FleetManager()
-            >>> print(fleet.head)
-            None
-        """
-        self.head = None
-        self.ongoing_rides=[]
-
-    def add_vehicle(self, vehicle_id, vehicle_type, status, location,location_geo,driver_id,next_location=None, next_location_geo=None):
-        """
-        Add a new vehicle to the fleet.
-
-        Args:
-            vehicle_id (str): Unique ID of the vehicle.
-            vehicle_type (str): Type of the vehicle.
-            status (str): Status of the vehicle.
-            location (str): Current location of the vehicle.
-            location_geo (str): Geo-cordinates 
-            driver_id (str): Unique ID of the driver.
-
-        Example:
-            >>> fleet = FleetManager()
-            >>> fleet.add_vehicle("V001", "car", "available", "Burj Khalifa","25.1972, 55.2744",1)
-            >>> fleet.add_vehicle("V002", "bike", "available", "Dubai Marina","25.0772, 55.1330",2)
-        """
-        new_vehicle = Vehicle(vehicle_id, vehicle_type, status, location,location_geo,driver_id,next_location, next_location_geo)
-        new_vehicle.next = self.head
-        self.head = new_vehicle
-        print(f"Vehicle {vehicle_id} added.")
-
-    def remove_vehicle(self, vehicle_id):
-        """
-        Remove a vehicle from the fleet by ID.
-
-        Args:
-            vehicle_id (str): The ID of the vehicle to be removed.
-        Example:
-            >>> fleet = FleetManager()
-            >>> fleet.add_vehicle("V003", "bus", "available", "Burjuman Metro Station","25.2528, 55.3032",3)
-            >>> fleet.remove_vehicle("V003")
-            Vehicle V003 removed.
-        """
-        current = self.head
-        prev = None
-        while current:
-            if current.vehicle_id == vehicle_id:
-                if prev:
-                    prev.next = current.next
-                else:
-                    self.head = current.next
-                print(f"Vehicle {vehicle_id} removed.")
-                return
-            prev = current
-            current = current.next
-        print(f"Vehicle {vehicle_id} not found.")
-
-    def display_fleet(self):
-        """
-        Print details of all vehicles in the fleet.
-
-        Example:
-            >>> fleet = FleetManager()
-            >>> fleet.add_vehicle("V004", "car", "available", "Dubai Mall",(25.1985, 55.2796),6)
-            >>> fleet.display_fleet()
-            ID: V004, Type: car, Status: available, Location: Dubai Mall
-        """
-        current = self.head
-        if not current:
-            print("No vehicles in the fleet.")
-        while current:
-          print(f"ID: {current.vehicle_id}, Type: {current.vehicle_type} Status: {current.status}, Location: {current.location}")
-          current = current.next
-            
-            
-    def get_available_vehicles(self):
-      """
-      Returns a list of all available vehicles in the fleet.
-      """
-      available = []
-      current = self.head
-      while current:
-        if current.status == "available":
-            available.append(current)
-        current = current.next
-      return available
-    
-    def update_vehicle_info(self, vehicle_id, driver_id=None, status=None, location=None, location_geo=None):
-        """
-        Update specified attributes of a vehicle in the fleet.
-
-        Args:
-            vehicle_id (str): Unique ID of the vehicle to update.
-            driver_id (str, optional): New driver ID.
-            status (str, optional): New status of the vehicle (e.g., 'available', 'occupied').
-            location (str, optional): New location description.
-            location_geo (str, optional): New geographic coordinates.
-
-        Returns:
-            bool: True if the vehicle was found and updated, False otherwise.
-
-        Example:
-            >>> fleet.update_vehicle_info("V001", status="occupied")
-            >>> fleet.update_vehicle_info("V002", location="Dubai Mall", location_geo="25.1975, 55.2790")
-        """
-        current = self.head
-        while current:
-            if current.vehicle_id == vehicle_id:
-                if driver_id is not None:
-                    current.driver_id = driver_id
-                if status is not None:
-                    current.status = status
-                if location is not None:
-                    current.location = location
-                if location_geo is not None:
-                    current.location_geo = location_geo
-                return True
-            current = current.next
-        return False
-    
-    def get_available_vehicles(self):
-        """
-        Returns a list of all available vehicles in the fleet.
-        """
-        available = []
-        current = self.head
-        while current:
-          if current.status == "available":
-            available.append(current)
-            current = current.next
-        return available
-    
-    def get_vehicle_by_id(self, vehicle_id):
-        """
-        Retrieves a vehicle from the fleet using its ID.
-
-        Args:
-          vehicle_id (str or int): The ID of the vehicle to find.
-        Returns:
-        Vehicle or None: The vehicle object if found, otherwise None.
-        """
-        current = self.head
-        while current:
-          if current.vehicle_id == vehicle_id:
-            return current
-          current = current.next
-        return None
-  
-
-
+import threading
+from array import array
+from collections import defaultdict
+from geo_utils import haversine_many, np, parse_geo
+from spatial_index import GridSpatialIndex
+from vehicle_node import Vehicle, normalize_vehicle_type
+
+NAN = float("nan")
+
+class FleetManager:
+    """
+    A hash-indexed fleet manager to handle ride-sharing vehicles.
+
+    Vehicles are kept in a registry keyed by vehicle_id, with secondary indexes
+    by status and vehicle type, so lookups, updates and removals are O(1).
+    The vehicles are also chained in a doubly linked list starting at `head`
+    (newest first), which keeps the iteration order stable.
+
+    Attributes:
+        head (Vehicle): Most recently added vehicle, or None.
+        vehicles (dict): Maps vehicle_id -> Vehicle.
+        vehicles_by_status (dict): Maps status -> {vehicle_id: Vehicle} (a merged copy of the shards).
+        vehicles_by_type (dict): Maps vehicle_type (lower-cased) -> {vehicle_id: Vehicle}
+            (a merged copy of the shards).
+        status_shards, type_shards (list): Per lock shard, the status and type indexes
+            of the vehicles hashing to that shard.
+        spatial_index (GridSpatialIndex): Positions of the available vehicles.
+        coords (array): Packed float64 [lat0, lon0, lat1, lon1, ...] positions, one
+            pair per slot; NaN for free and spare slots and vehicles without a position.
+        slots (dict): Maps vehicle_id -> slot in `coords`, stable for the vehicle's lifetime.
+
+    Positions are normalized to (lat, lon) float tuples when a vehicle is added
+    or moved, so a "lat, lon" string is parsed once instead of on every distance
+    computation. Slots of removed vehicles are reused, so `coords` only grows
+    with the peak fleet size. It grows by doubling into a new array that
+    replaces the old one, never in place, so views handed out by coords_view()
+    can never make adding a vehicle fail.
+
+    The fleet can be shared between threads. Each vehicle hashes to one of
+    `lock_shards` locks that serialize changes to that vehicle and guard its
+    shard of the status and type indexes, and claim_vehicle() uses it as a
+    compare-and-set on the status, so two dispatchers can never take the same
+    vehicle. The spatial index locks by grid region, so nearest-vehicle
+    searches run in parallel with each other and with status changes.
+    `index_lock` only guards the linked list and the slot table: it is taken,
+    always after a shard lock, when vehicles are added or removed, when a
+    position is written and while positions() gathers coordinates.
+    """
+
+    def __init__(self, cell_size=0.01, lock_shards=16):
+        """
+        Initialize an empty fleet.
+
+        Args:
+            cell_size (float): Grid cell size in degrees for the spatial index (0.01 is about 1 km).
+            lock_shards (int): Number of per-vehicle lock shards.
+
+        Example:
+            >>> fleet = FleetManager()
+            >>> print(fleet.head)
+            None
+        """
+        self.head = None
+        self.ongoing_rides=[]
+        self.vehicles = {}
+        self.status_shards = [defaultdict(dict) for _ in range(lock_shards)]
+        self.type_shards = [defaultdict(dict) for _ in range(lock_shards)]
+        self.spatial_index = GridSpatialIndex(cell_size)
+        self.coords = array("d")
+        self.slots = {}
+        self.slot_ids = []  # slot -> vehicle_id, or None when free
+        self.free_slots = []
+        self.shard_locks = [threading.Lock() for _ in range(lock_shards)]
+        self.index_lock = threading.RLock()
+
+    def __len__(self):
+        return len(self.vehicles)
+
+    @property
+    def vehicles_by_status(self):
+        return self._merge(self.status_shards)
+
+    @property
+    def vehicles_by_type(self):
+        return self._merge(self.type_shards)
+
+    def __contains__(self, vehicle_id):
+        return vehicle_id in self.vehicles
+
+    def __iter__(self):
+        """Iterates over the vehicles, newest first."""
+        current = self.head
+        while current:
+            yield current
+            current = current.next
+
+    def add_vehicle(self, vehicle_id, vehicle_type, status, location,location_geo,driver_id,next_location=None, next_location_geo=None):
+        """
+        Add a new vehicle to the fleet.
+
+        Args:
+            vehicle_id (str): Unique ID of the vehicle.
+            vehicle_type (str): Type of the vehicle.
+            status (str): Status of the vehicle.
+            location (str): Current location of the vehicle.
+            location_geo (str): Geo-cordinates
+            driver_id (str): Unique ID of the driver.
+
+        Example:
+            >>> fleet = FleetManager()
+            >>> fleet.add_vehicle("V001", "car", "available", "Burj Khalifa","25.1972, 55.2744",1)
+            >>> fleet.add_vehicle("V002", "bike", "available", "Dubai Marina","25.0772, 55.1330",2)
+        """
+        location_geo = parse_geo(location_geo)
+        if next_location_geo is not None:
+            next_location_geo = parse_geo(next_location_geo)
+        shard = self._shard(vehicle_id)
+        with self.shard_locks[shard], self.index_lock:
+            if vehicle_id in self.vehicles:
+                print(f"Vehicle {vehicle_id} already exists.")
+                return
+            new_vehicle = Vehicle(vehicle_id, vehicle_type, status, location,location_geo,driver_id,next_location, next_location_geo)
+            # Take the slot first, so a failure leaves no half-registered vehicle
+            self._allocate_slot(vehicle_id)
+            self._write_position(vehicle_id, location_geo)
+            new_vehicle.next = self.head
+            if self.head:
+                self.head.prev = new_vehicle
+            self.head = new_vehicle
+
+            self.vehicles[vehicle_id] = new_vehicle
+            self.status_shards[shard][status][vehicle_id] = new_vehicle
+            self.type_shards[shard][normalize_vehicle_type(vehicle_type)][vehicle_id] = new_vehicle
+            self._update_spatial_index(new_vehicle)
+        print(f"Vehicle {vehicle_id} added.")
+
+    def remove_vehicle(self, vehicle_id):
+        """
+        Remove a vehicle from the fleet by ID.
+
+        Args:
+            vehicle_id (str): The ID of the vehicle to be removed.
+        Example:
+            >>> fleet = FleetManager()
+            >>> fleet.add_vehicle("V003", "bus", "available", "Burjuman Metro Station","25.2528, 55.3032",3)
+            >>> fleet.remove_vehicle("V003")
+            Vehicle V003 removed.
+        """
+        shard = self._shard(vehicle_id)
+        with self.shard_locks[shard], self.index_lock:
+            vehicle = self.vehicles.pop(vehicle_id, None)
+            if vehicle is None:
+                print(f"Vehicle {vehicle_id} not found.")
+                return
+
+            if vehicle.prev:
+                vehicle.prev.next = vehicle.next
+            else:
+                self.head = vehicle.next
+            if vehicle.next:
+                vehicle.next.prev = vehicle.prev
+            vehicle.next = vehicle.prev = None
+
+            self._unindex(self.status_shards[shard], vehicle.status, vehicle_id)
+            self._unindex(self.type_shards[shard], normalize_vehicle_type(vehicle.vehicle_type), vehicle_id)
+            self.spatial_index.remove(vehicle_id)
+            self._free_slot(vehicle_id)
+        print(f"Vehicle {vehicle_id} removed.")
+
+    def display_fleet(self):
+        """
+        Print details of all vehicles in the fleet.
+
+        Example:
+            >>> fleet = FleetManager()
+            >>> fleet.add_vehicle("V004", "car", "available", "Dubai Mall",(25.1985, 55.2796),6)
+            >>> fleet.display_fleet()
+            ID: V004, Type: car, Status: available, Location: Dubai Mall
+        """
+        if not self.head:
+            print("No vehicles in the fleet.")
+        for current in self:
+          print(f"ID: {current.vehicle_id}, Type: {current.vehicle_type} Status: {current.status}, Location: {current.location}")
+
+    def get_available_vehicles(self, vehicle_type=None):
+        """
+        Returns a list of all available vehicles in the fleet.
+
+        Only the status index is read, so busy vehicles are never touched.
+
+        Args:
+            vehicle_type (str, optional): Restrict the result to this vehicle type.
+        """
+        return self.get_vehicles_by_status("available", vehicle_type)
+
+    def get_vehicles_by_status(self, status, vehicle_type=None):
+        """
+        Returns a list of the vehicles with the given status.
+
+        Args:
+            status (str): Status to look up (e.g., 'available', 'assigned').
+            vehicle_type (str, optional): Restrict the result to this vehicle type.
+        """
+        if vehicle_type is not None:
+            vehicle_type = normalize_vehicle_type(vehicle_type)
+        result = []
+        for lock, by_status, by_type in zip(self.shard_locks, self.status_shards, self.type_shards):
+            with lock:
+                by_status = by_status.get(status, {})
+                if vehicle_type is None:
+                    result.extend(by_status.values())
+                    continue
+                by_type = by_type.get(vehicle_type, {})
+                # Walk the smaller index and probe the other one
+                if len(by_type) < len(by_status):
+                    result.extend(v for vid, v in by_type.items() if vid in by_status)
+                else:
+                    result.extend(v for vid, v in by_status.items() if vid in by_type)
+        return result
+
+    def update_vehicle_info(self, vehicle_id, driver_id=None, status=None, location=None, location_geo=None):
+        """
+        Update specified attributes of a vehicle in the fleet.
+
+        Args:
+            vehicle_id (str): Unique ID of the vehicle to update.
+            driver_id (str, optional): New driver ID.
+            status (str, optional): New status of the vehicle (e.g., 'available', 'occupied').
+            location (str, optional): New location description.
+            location_geo (tuple or str, optional): New geographic coordinates.
+
+        Returns:
+            bool: True if the vehicle was found and updated, False otherwise.
+
+        Example:
+            >>> fleet.update_vehicle_info("V001", status="occupied")
+            >>> fleet.update_vehicle_info("V002", location="Dubai Mall", location_geo="25.1975, 55.2790")
+        """
+        with self._shard_lock(vehicle_id):
+            current = self.vehicles.get(vehicle_id)
+            if current is None:
+                return False
+
+            if driver_id is not None:
+                current.driver_id = driver_id
+            if location is not None:
+                current.location = location
+            if location_geo is not None:
+                current.location_geo = parse_geo(location_geo)
+                with self.index_lock:
+                    self._write_position(vehicle_id, current.location_geo)
+            if status is not None:
+                self._set_status(current, status)
+            elif location_geo is not None:
+                self._update_spatial_index(current)
+            return True
+
+    def claim_vehicle(self, vehicle_id, expected_status="available", new_status="assigned"):
+        """
+        Atomically changes a vehicle's status if it still has the expected one (compare-and-set).
+
+        Dispatchers running in parallel may pick the same nearest vehicle; only the
+        first claim succeeds and the others move on to their next candidate.
+
+        Args:
+            vehicle_id (str): Vehicle to claim.
+            expected_status (str): Status the vehicle must currently have.
+            new_status (str): Status to set.
+
+        Returns:
+            bool: True if this call changed the status.
+
+        Example:
+            >>> if fleet.claim_vehicle("V001"):
+            ...     print("V001 is ours")
+        """
+        with self._shard_lock(vehicle_id):
+            vehicle = self.vehicles.get(vehicle_id)
+            if vehicle is None or vehicle.status != expected_status:
+                return False
+            self._set_status(vehicle, new_status)
+            return True
+
+    def find_nearest_available(self, location_geo, k=1, radius_km=None, vehicle_type=None):
+        """
+        Finds the available vehicles closest to a point using the spatial index.
+
+        Args:
+            location_geo (tuple or str): Coordinates to search around.
+            k (int, optional): Maximum number of vehicles to return; None for no limit.
+            radius_km (float, optional): Ignore vehicles farther than this distance.
+            vehicle_type (str, optional): Only return vehicles of this type (case-insensitive).
+
+        Returns:
+            list: (distance_km, Vehicle) tuples sorted by distance. With other threads
+            dispatching, a vehicle may be taken right after it was found; claim it
+            with claim_vehicle() before use.
+
+        Example:
+            >>> fleet.find_nearest_available((25.1985, 55.2796), k=3, radius_km=5)
+        """
+        predicate = None
+        if vehicle_type is not None:
+            vehicle_type = normalize_vehicle_type(vehicle_type)
+            type_shards = self.type_shards
+
+            def predicate(vehicle_id):
+                return vehicle_id in type_shards[self._shard(vehicle_id)].get(vehicle_type, ())
+        matches = self.spatial_index.nearest(location_geo, k=k, radius_km=radius_km, predicate=predicate)
+        result = []
+        for distance, vehicle_id in matches:
+            vehicle = self.vehicles.get(vehicle_id)
+            if vehicle is not None:  # skip vehicles removed during the search
+                result.append((distance, vehicle))
+        return result
+
+    def positions(self, vehicle_ids):
+        """
+        Gathers vehicle positions from the packed coordinate array.
+
+        Args:
+            vehicle_ids (iterable): Vehicles to look up.
+
+        Returns:
+            numpy.ndarray or array: (n, 2) float64 array, or a flat
+            [lat0, lon0, ...] array('d') when NumPy is unavailable. Both are
+            accepted by the geo_utils distance kernels. Vehicles that are not
+            (or no longer) in the fleet get NaN coordinates.
+        """
+        # Under index_lock, so a slot freed by a concurrent removal cannot be
+        # reused by another vehicle between the lookup and the read
+        with self.index_lock:
+            slots = [self.slots.get(vehicle_id) for vehicle_id in vehicle_ids]
+            if np is not None:
+                result = np.full((len(slots), 2), NAN)
+                known = [i for i, slot in enumerate(slots) if slot is not None]
+                if known:
+                    result[known] = np.frombuffer(self.coords, dtype=np.float64).reshape(-1, 2)[
+                        [slots[i] for i in known]]
+                return result
+            result = array("d")
+            for slot in slots:
+                result.extend(self.coords[2 * slot:2 * slot + 2] if slot is not None else (NAN, NAN))
+            return result
+
+    def coords_view(self):
+        """
+        Returns a zero-copy (slots, 2) NumPy view of `coords`, or a memoryview without NumPy.
+
+        Row i is the position of the vehicle in slot i (see `slots`). The view
+        follows later moves, but once `coords` has grown to make room for new
+        vehicles it still shows the old array: take a new view after adding vehicles.
+        """
+        used = 2 * len(self.slot_ids)
+        if np is not None:
+            return np.frombuffer(self.coords, dtype=np.float64, count=used).reshape(-1, 2)
+        return memoryview(self.coords)[:used]
+
+    def distances_from(self, location_geo, vehicle_ids):
+        """
+        Calculates the great-circle distance from a point to each given vehicle.
+
+        Args:
+            location_geo (tuple or str): Reference point, e.g. a pickup.
+            vehicle_ids (list): Vehicles to measure.
+
+        Returns:
+            numpy.ndarray or list: Distances in kilometers, aligned with vehicle_ids
+            (NaN for vehicles without a position or no longer in the fleet).
+        """
+        point = parse_geo(location_geo)
+        if point is None:
+            raise ValueError(f"Invalid coordinates: {location_geo!r}")
+        return haversine_many(point, self.positions(vehicle_ids))
+
+    def get_vehicle_by_id(self, vehicle_id):
+        """
+        Retrieves a vehicle from the fleet using its ID.
+
+        Args:
+          vehicle_id (str or int): The ID of the vehicle to find.
+        Returns:
+        Vehicle or None: The vehicle object if found, otherwise None.
+        """
+        return self.vehicles.get(vehicle_id)
+
+    def _update_spatial_index(self, vehicle):
+        """Keeps the spatial index limited to available vehicles at their current position."""
+        if vehicle.status == "available":
+            self.spatial_index.insert(vehicle.vehicle_id, vehicle.location_geo)
+        else:
+            self.spatial_index.remove(vehicle.vehicle_id)
+
+    def _set_status(self, vehicle, status):
+        """Moves a vehicle between status buckets; the caller holds the vehicle's shard lock."""
+        if status != vehicle.status:
+            by_status = self.status_shards[self._shard(vehicle.vehicle_id)]
+            self._unindex(by_status, vehicle.status, vehicle.vehicle_id)
+            by_status[status][vehicle.vehicle_id] = vehicle
+            vehicle.status = status
+        self._update_spatial_index(vehicle)
+
+    def _shard(self, vehicle_id):
+        return hash(vehicle_id) % len(self.shard_locks)
+
+    def _shard_lock(self, vehicle_id):
+        return self.shard_locks[self._shard(vehicle_id)]
+
+    def _merge(self, shards):
+        """Combines per-shard indexes into one {key: {vehicle_id: Vehicle}} dict."""
+        merged = defaultdict(dict)
+        for lock, index in zip(self.shard_locks, shards):
+            with lock:
+                for key, bucket in index.items():
+                    merged[key].update(bucket)
+        return dict(merged)
+
+    def _allocate_slot(self, vehicle_id):
+        if self.free_slots:
+            slot = self.free_slots.pop()
+            self.slot_ids[slot] = vehicle_id
+        else:
+            slot = len(self.slot_ids)
+            if 2 * slot == len(self.coords):
+                self._grow_coords()
+            self.slot_ids.append(vehicle_id)
+        self.slots[vehicle_id] = slot
+
+    def _grow_coords(self):
+        """Doubles the capacity of `coords` into a new array, leaving existing views on the old one."""
+        spare = max(len(self.coords), 32)
+        self.coords = self.coords + array("d", (NAN,)) * spare
+
+    def _free_slot(self, vehicle_id):
+        slot = self.slots.pop(vehicle_id)
+        self.coords[2 * slot] = self.coords[2 * slot + 1] = NAN
+        self.slot_ids[slot] = None
+        self.free_slots.append(slot)
+
+    def _write_position(self, vehicle_id, point):
+        slot = self.slots[vehicle_id]
+        # One slice assignment, so lock-free readers never see half a position
+        self.coords[2 * slot:2 * slot + 2] = array("d", point if point is not None else (NAN, NAN))
+
+    @staticmethod
+    def _unindex(index, key, vehicle_id):
+        """Removes vehicle_id from a secondary index bucket, dropping empty buckets."""
+        bucket = index.get(key)
+        if bucket is not None:
+            bucket.pop(vehicle_id, None)
+            if not bucket:
+                del index[key]
@@ -0,0 +1,124 @@
+import math
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; the batch kernels fall back to pure Python
+    np = None
+
+EARTH_RADIUS_KM = 6371.0  # Mean radius of the Earth in kilometers
+
+
+def parse_geo(location_geo):
+    """
+    Converts geo-coordinates into a (latitude, longitude) tuple of floats.
+
+    Args:
+        location_geo (tuple or str): Either a (lat, lon) pair or a "lat, lon" string.
+
+    Returns:
+        tuple or None: (lat, lon) as floats, or None if the value is missing or malformed.
+
+    Example:
+        parse_geo("25.1972, 55.2744")  # (25.1972, 55.2744)
+        parse_geo((25.1985, 55.2796))  # (25.1985, 55.2796)
+    """
+    if location_geo is None:
+        return None
+    try:
+        if isinstance(location_geo, str):
+            lat, lon = location_geo.split(",")
+        else:
+            lat, lon = location_geo
+        return float(lat), float(lon)
+    except (TypeError, ValueError):
+        return None
+
+
+def haversine(loc1, loc2):
+    """
+    Calculates the great-circle distance between two coordinates using the Haversine formula.
+
+    Args:
+        loc1 (tuple): (latitude, longitude) of point A.
+        loc2 (tuple): (latitude, longitude) of point B.
+
+    Returns:
+        float: Distance in kilometers.
+    """
+    lat1, lon1 = loc1
+    lat2, lon2 = loc2
+
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    delta_phi = math.radians(lat2 - lat1)
+    delta_lambda = math.radians(lon2 - lon1)
+
+    a = math.sin(delta_phi / 2)**2 + math.cos(phi1) * math.cos(phi2) * math.sin(delta_lambda / 2)**2
+    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+    return EARTH_RADIUS_KM * c
+
+
+def haversine_many(origin, coords):
+    """
+    Calculates the distance from one point to many points in a single vectorized call.
+
+    Args:
+        origin (tuple): (latitude, longitude) of the reference point (e.g., a pickup).
+        coords (array-like): Coordinates of the other points, either an (n, 2) array,
+            a sequence of (lat, lon) pairs, or a flat [lat0, lon0, lat1, lon1, ...] buffer.
+
+    Returns:
+        numpy.ndarray or list: n distances in kilometers (a list when NumPy is unavailable).
+
+    Example:
+        haversine_many((25.0773, 55.1344), [(25.0772, 55.1330), (25.1985, 55.2796)])
+    """
+    lat0, lon0 = origin
+    if np is None:
+        return [haversine((lat0, lon0), point) for point in _pairs(coords)]
+
+    points = np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+    lat = np.radians(points[:, 0])
+    lon = np.radians(points[:, 1])
+    phi0 = math.radians(lat0)
+    lambda0 = math.radians(lon0)
+
+    a = np.sin((lat - phi0) / 2)**2 + math.cos(phi0) * np.cos(lat) * np.sin((lon - lambda0) / 2)**2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def haversine_matrix(origins, destinations):
+    """
+    Calculates the distance between every origin and every destination.
+
+    Args:
+        origins (array-like): m coordinates, in any form accepted by haversine_many.
+        destinations (array-like): n coordinates, in any form accepted by haversine_many.
+
+    Returns:
+        numpy.ndarray or list: (m, n) distances in kilometers (a list of rows when NumPy is unavailable).
+    """
+    if np is None:
+        targets = list(_pairs(destinations))
+        return [haversine_many(origin, targets) for origin in _pairs(origins)]
+
+    src = np.radians(np.asarray(origins, dtype=np.float64).reshape(-1, 2))
+    dst = np.radians(np.asarray(destinations, dtype=np.float64).reshape(-1, 2))
+    lat1 = src[:, 0:1]
+    lon1 = src[:, 1:2]
+    lat2 = dst[:, 0]
+    lon2 = dst[:, 1]
+
+    a = np.sin((lat2 - lat1) / 2)**2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2)**2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def _pairs(coords):
+    """Yields (lat, lon) pairs from a sequence of pairs or a flat coordinate buffer."""
+    coords = list(coords) if not hasattr(coords, "__len__") else coords
+    if len(coords) and not hasattr(coords[0], "__len__"):
+        for i in range(0, len(coords) - 1, 2):
+            yield coords[i], coords[i + 1]
+    else:
+        for lat, lon in coords:
+            yield lat, lon
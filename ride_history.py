@@ -1,83 +1,268 @@
-from collections import deque
-from ride_request import RideRequestQueue
-class RideLog:
-    """
-    Represents a single ride instance in the ride history.
-
-    Attributes:
-        ride_id (str): Unique ride identifier.
-        user_id (str): ID of the user who took the ride.
-        vehicle_id (str): Vehicle used in the ride.
-        location (str): Start or destination.
-        rating (float): User-given rating after the ride.
-    """
-    def __init__(self, ride_id, user_id, vehicle_id, location, rating):
-        self.ride_id = ride_id
-        self.user_id = user_id
-        self.vehicle_id = vehicle_id
-        self.location = location
-        self.rating = rating
-
-    def __repr__(self):
-        return f"RideLog({self.ride_id}, {self.user_id}, {self.location}, Rating: {self.rating})"
-
-class RideHistoryManager:
-    """
-    Manages ride history for rebooking using a stack (LIFO).
-
-    Example:
-        history = RideHistoryManager()
-        history.add_ride(rideLog)
-        history.rebook_last_ride()
-    """
-    def __init__(self):
-        self.stack = []
-
-    def add_ride(self, ride_log):
-        """Pushes a ride onto the history stack."""
-        self.stack.append(ride_log)
-
-    def view_history(self):
-        """Returns all rides in reverse order (latest first)."""
-        return list(reversed(self.stack))
-
-    def rebook_last_ride(self):
-        """Returns the last ride without removing it (peek)."""
-        return self.stack[-1] if self.stack else None
-
-
-def merge_sort_rides(rides, key_func=lambda ride: ride.rating):
-    """
-    Sorts rides based on a key function (e.g., rating, date) using merge sort.
-    
-    Args:
-        rides (list): List of Ride objects.
-        key_func (function): Function to extract comparison key from a ride.
-
-    Returns:
-        List of sorted Ride objects.
-    """
-    if len(rides) <= 1:
-        return rides
-
-    mid = len(rides) // 2
-    left = merge_sort_rides(rides[:mid], key_func)
-    right = merge_sort_rides(rides[mid:], key_func)
-
-    return merge(left, right, key_func)
-
-def merge(left, right, key_func):
-    result = []
-    i = j = 0
-
-    while i < len(left) and j < len(right):
-        if key_func(left[i]) <= key_func(right[j]):
-            result.append(left[i])
-            i += 1
-        else:
-            result.append(right[j])
-            j += 1
-
-    result.extend(left[i:])
-    result.extend(right[j:])
-    return result
+import heapq
+import pickle
+import tempfile
+from collections import deque
+from itertools import islice
+from columnar import RideLogColumns
+class RideLog:
+    """
+    Represents a single ride instance in the ride history.
+
+    Attributes:
+        ride_id (str): Unique ride identifier.
+        user_id (str): ID of the user who took the ride.
+        vehicle_id (str): Vehicle used in the ride.
+        location (str): Where the ride ended.
+        rating (float): User-given rating after the ride.
+        vehicle_type (str): Vehicle type the user asked for, or None.
+        pickup (str): Pickup location, or None.
+        pickup_geo (tuple): Pickup coordinates, or None.
+        location_geo (tuple): Coordinates of `location`, or None.
+        destination (str): Destination the user asked for, or None. Differs from
+            `location` when the ride ended early.
+        destination_geo (tuple): Coordinates of `destination`, or None.
+    """
+    __slots__ = ("ride_id", "user_id", "vehicle_id", "location", "rating",
+                 "vehicle_type", "pickup", "pickup_geo", "location_geo",
+                 "destination", "destination_geo")
+
+    def __init__(self, ride_id, user_id, vehicle_id, location, rating,
+                 vehicle_type=None, pickup=None, pickup_geo=None, location_geo=None,
+                 destination=None, destination_geo=None):
+        self.ride_id = ride_id
+        self.user_id = user_id
+        self.vehicle_id = vehicle_id
+        self.location = location
+        self.rating = rating
+        self.vehicle_type = vehicle_type
+        self.pickup = pickup
+        self.pickup_geo = pickup_geo
+        self.location_geo = location_geo
+        self.destination = destination
+        self.destination_geo = destination_geo
+
+    def __repr__(self):
+        return f"RideLog({self.ride_id}, {self.user_id}, {self.location}, Rating: {self.rating})"
+
+class RideHistoryManager:
+    """
+    Manages ride history for rebooking.
+
+    Every ride is appended to a global log and to a bounded deque of the user's
+    latest rides, so a user's history and last ride are found without scanning
+    other users' rides. History is read latest-first through iterators, without
+    copying.
+
+    The global log is the in-memory list `stack`, or a RideLogStore when one is
+    given: rides are then persisted to disk, the full history is read back from
+    the memory-mapped log, and only the per-user deques stay in memory. They are
+    rebuilt from the store on startup.
+
+    Reads take no lock and can run while one writer adds rides: a user's
+    history page is copied from the newest end of its deque (only the offset +
+    limit rides the page needs), and the global log is read up to the length it
+    had when the read started.
+
+    Example:
+        history = RideHistoryManager()
+        history.add_ride(rideLog)
+        history.view_history("U123", limit=10)
+        history.rebook_last_ride("U123")
+
+        durable = RideHistoryManager(store=RideLogStore("data/ride_log"))
+    """
+    def __init__(self, max_rides_per_user=100, store=None, columnar=False):
+        """
+        Args:
+            max_rides_per_user (int, optional): Rides kept per user; older ones stay
+                in the global log only. None keeps all of them.
+            store (RideLogStore, optional): Persistent global log.
+            columnar (bool): Keep the in-memory log in a RideLogColumns
+                struct-of-arrays; rides are then read back as RideLogView objects.
+        """
+        self.stack = RideLogColumns() if columnar else []
+        self.store = store
+        self.max_rides_per_user = max_rides_per_user
+        self.user_rides = {}  # user_id -> deque of RideLog, oldest first
+        if store is not None and len(store):
+            self.rebuild()
+
+    def __len__(self):
+        return len(self.store) if self.store is not None else len(self.stack)
+
+    def add_ride(self, ride_log):
+        """Appends a ride to the global log and to its user's history."""
+        if self.store is not None:
+            self.store.append(ride_log)
+        elif isinstance(self.stack, RideLogColumns):
+            ride_log = self.stack.append(ride_log)
+        else:
+            self.stack.append(ride_log)
+        self._user_deque(ride_log.user_id).append(ride_log)
+
+    def view_history(self, user_id=None, limit=None, offset=0):
+        """
+        Iterates over rides, latest first.
+
+        Args:
+            user_id (str, optional): Only this user's rides. Defaults to all rides.
+            limit (int, optional): Maximum number of rides to return.
+            offset (int, optional): Number of latest rides to skip.
+
+        Returns:
+            iterator: RideLog objects, latest first.
+
+        Example:
+            >>> list(history.view_history("U123", limit=5))
+        """
+        stop = None if limit is None else offset + limit
+        if user_id is not None:
+            return islice(self._latest_user_rides(user_id, stop), offset, None)
+        if self.store is not None:
+            rides = self.store.records(reverse=True)
+        else:
+            rides = reversed(self.stack)
+        return islice(rides, offset, stop)
+
+    def rebook_last_ride(self, user_id=None):
+        """
+        Returns the latest ride without removing it (peek).
+
+        Args:
+            user_id (str, optional): Only consider this user's rides.
+        """
+        if user_id is not None:
+            rides = self.user_rides.get(user_id)
+            return rides[-1] if rides else None
+        if self.store is not None:
+            return self.store.get(-1) if len(self.store) else None
+        return self.stack[-1] if self.stack else None
+
+    def rebuild(self):
+        """
+        Reloads the per-user histories from the store.
+
+        The log is read latest first and a record is only decoded while its
+        user's deque still has room, so startup cost is dominated by reading
+        user ids rather than building RideLog objects.
+        """
+        self.user_rides = {}
+
+        def has_room(user_id):
+            rides = self.user_rides.get(user_id)
+            return rides is None or rides.maxlen is None or len(rides) < rides.maxlen
+
+        for ride_log in self.store.records(reverse=True, user_filter=has_room):
+            self._user_deque(ride_log.user_id).appendleft(ride_log)
+
+    def close(self):
+        """Syncs and closes the store, if any."""
+        if self.store is not None:
+            self.store.close()
+
+    def _latest_user_rides(self, user_id, count):
+        """Copies the newest `count` rides of a user (all if None), latest first."""
+        rides = self.user_rides.get(user_id)
+        if not rides:
+            return ()
+        while True:
+            try:
+                return tuple(islice(reversed(rides), count))
+            except RuntimeError:  # a ride was added while copying; copy the page again
+                continue
+
+    def _user_deque(self, user_id):
+        rides = self.user_rides.get(user_id)
+        if rides is None:
+            rides = self.user_rides[user_id] = deque(maxlen=self.max_rides_per_user)
+        return rides
+
+
+def merge_sort_rides(rides, key_func=lambda ride: ride.rating):
+    """
+    Sorts rides based on a key function (e.g., rating, date).
+
+    The sort is stable and O(n log n); key_func is called once per ride.
+
+    Args:
+        rides (list): List of Ride objects.
+        key_func (function): Function to extract comparison key from a ride.
+
+    Returns:
+        List of sorted Ride objects.
+    """
+    return sorted(rides, key=key_func)
+
+
+def external_sort_rides(rides, key_func=lambda ride: ride.rating, max_in_memory=100000,
+                        reverse=False, tmp_dir=None):
+    """
+    Sorts an iterable of rides that may not fit in memory, yielding them in order.
+
+    Rides are read in chunks of `max_in_memory`; each chunk is sorted and spilled
+    to a temporary file as a run, then the runs are combined with a k-way
+    heapq.merge that reads them back incrementally. At most one chunk plus one
+    batch per run is held in memory. Input that fits in a single chunk is
+    sorted in memory without touching disk. The sort is stable and key_func is
+    called once per ride.
+
+    Args:
+        rides (iterable): Rides to sort, e.g. RideHistoryManager.view_history().
+        key_func (function): Function to extract comparison key from a ride.
+        max_in_memory (int): Maximum number of rides sorted in memory at once.
+        reverse (bool): Yield the largest keys first.
+        tmp_dir (str, optional): Directory for the temporary run files.
+
+    Yields:
+        Rides in sorted order.
+
+    Example:
+        >>> for ride in external_sort_rides(store.records(), key_func=lambda r: r.rating):
+        ...     report.write(ride)
+    """
+    sign = -1 if reverse else 1
+    runs = []
+    try:
+        chunk = []
+        for seq, ride in enumerate(rides):
+            # The sequence number keeps equal keys in input order and rides uncompared
+            chunk.append((key_func(ride), sign * seq, ride))
+            if len(chunk) >= max_in_memory:
+                runs.append(_spill_run(chunk, reverse, tmp_dir))
+                chunk = []
+        chunk.sort(reverse=reverse)
+        if not runs:
+            for _, _, ride in chunk:
+                yield ride
+            return
+        if chunk:
+            runs.append(_spill_run(chunk, reverse, tmp_dir, presorted=True))
+        for _, _, ride in heapq.merge(*(_read_run(run) for run in runs), reverse=reverse):
+            yield ride
+    finally:
+        for run in runs:
+            run.close()
+
+
+def _spill_run(chunk, reverse, tmp_dir, presorted=False):
+    """Sorts a chunk and writes it to a temporary file in pickled batches."""
+    if not presorted:
+        chunk.sort(reverse=reverse)
+    run = tempfile.TemporaryFile(dir=tmp_dir)
+    for start in range(0, len(chunk), _RUN_BATCH):
+        pickle.dump(chunk[start:start + _RUN_BATCH], run, pickle.HIGHEST_PROTOCOL)
+    run.seek(0)
+    return run
+
+
+def _read_run(run):
+    """Yields the records of a spilled run, one batch in memory at a time."""
+    while True:
+        try:
+            batch = pickle.load(run)
+        except EOFError:
+            return
+        yield from batch
+
+
+_RUN_BATCH = 1024
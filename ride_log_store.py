@@ -0,0 +1,337 @@
+import mmap
+import os
+import struct
+import time
+from ride_history import RideLog
+
+# flags byte
+_USER_INT = 0x01
+_VEHICLE_INT = 0x02
+_PICKUP_GEO = 0x04
+_LOCATION_GEO = 0x08
+_RIDE_INT = 0x10
+_DESTINATION_GEO = 0x20
+
+# flags, ride_id, user_id, vehicle_id, location, vehicle_type, pickup, destination,
+# rating, pickup lat/lon, location lat/lon, destination lat/lon
+RECORD = struct.Struct("<B40s32s32s48s16s48s48s7d")
+# flags and user_id only, read when rebuilding per-user indexes
+_USER_FIELD = struct.Struct("<B40x32s")
+# A text field too long for its slot holds this marker byte (never the first
+# byte of UTF-8 text) and the position of the text in the segment's string file
+_LONG_TEXT = 0xFF
+_TEXT_REF = struct.Struct("<xQI")
+_SEGMENT_FORMAT = "rides-{:06d}.seg"
+_STRINGS_FORMAT = "rides-{:06d}.str"
+
+
+class RideLogStore:
+    """
+    Append-only, fixed-width binary log of RideLog records split into segments.
+
+    Every record has the same size, so record i of a segment sits at byte
+    i * RECORD.size and the number of stored rides follows from the file sizes.
+    Writes go to the newest segment, which is rotated after `segment_records`
+    records. fsync is batched: the file is synced every `fsync_every` records or
+    `fsync_interval` seconds, whichever comes first, so a crash loses at most
+    that many rides. Reads memory-map the segments and decode only the records
+    that are requested; a partially written trailing record is ignored, so
+    readers on other threads can scan the log while one writer appends.
+
+    Text fields are UTF-8 and stored in the record when they fit their width
+    (ride_id 40 bytes, user_id/vehicle_id 32, location/pickup/destination 48,
+    vehicle_type 16). Longer text is appended to the segment's string file and the record
+    keeps its offset and length, so nothing is truncated and records stay fixed
+    width. Integer ids are flagged so they come back as int.
+
+    Example:
+        store = RideLogStore("data/ride_log")
+        store.append(RideLog("r1", "U1", "V001", "Dubai Mall", 5.0))
+        store.flush()
+        for ride in store.records(reverse=True):
+            print(ride)
+        store.close()
+    """
+
+    def __init__(self, directory, segment_records=65536, fsync_every=256, fsync_interval=1.0,
+                 clock=time.monotonic):
+        """
+        Opens (or creates) a log directory.
+
+        Args:
+            directory (str): Directory holding the segment files.
+            segment_records (int): Records per segment before rotating to a new file.
+            fsync_every (int): Sync to disk after this many unsynced records.
+            fsync_interval (float): Sync to disk when the oldest unsynced record is this many seconds old.
+            clock (callable): Returns the current time in seconds.
+        """
+        self.directory = directory
+        self.segment_records = segment_records
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self.clock = clock
+        os.makedirs(directory, exist_ok=True)
+
+        self.segments = sorted(int(name[6:12]) for name in os.listdir(directory)
+                               if name.startswith("rides-") and name.endswith(".seg"))
+        self.segment_counts = [self._stored_records(number) for number in self.segments]
+        if not self.segments:
+            self.segments.append(1)
+            self.segment_counts.append(0)
+        # Drop a torn trailing record so new records stay aligned
+        path = self._path(self.segments[-1])
+        if os.path.exists(path):
+            os.truncate(path, self.segment_counts[-1] * RECORD.size)
+        self._file = open(path, "ab")
+        self._open_strings()
+        self._string_readers = {}  # segment number -> read handle of its string file
+        self.unsynced = 0
+        self.first_unsynced_at = None
+
+    def __len__(self):
+        return sum(self.segment_counts)
+
+    def append(self, ride_log):
+        """Writes a ride at the end of the log, rotating the segment when full."""
+        if self.segment_counts[-1] >= self.segment_records:
+            self._rotate()
+        self._file.write(encode_ride(ride_log, self._store_text))
+        self.segment_counts[-1] += 1
+        self.unsynced += 1
+        if self.first_unsynced_at is None:
+            self.first_unsynced_at = self.clock()
+        if (self.unsynced >= self.fsync_every
+                or self.clock() - self.first_unsynced_at >= self.fsync_interval):
+            self.sync()
+
+    def flush(self):
+        """Hands buffered records to the OS so readers can see them."""
+        try:
+            self._file.flush()
+        except ValueError:
+            pass  # closed by a concurrent rotation, which synced it first
+
+    def sync(self):
+        """Flushes and fsyncs the current segment."""
+        # Long text first, so no synced record points past the end of the string file
+        os.fsync(self._strings.fileno())
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self.unsynced = 0
+        self.first_unsynced_at = None
+
+    def close(self):
+        """Syncs and closes the current segment and every string file opened for reading."""
+        if not self._file.closed:
+            self.sync()
+            self._file.close()
+            self._strings.close()
+        readers, self._string_readers = self._string_readers, {}
+        for reader in readers.values():
+            reader.close()
+
+    def get(self, position):
+        """
+        Returns the ride stored at a position of the log (0 is the oldest).
+
+        Args:
+            position (int): Record number; negative values count from the end.
+        """
+        total = len(self)
+        if position < 0:
+            position += total
+        if not 0 <= position < total:
+            raise IndexError("ride log position out of range")
+        self.flush()
+        for number, count in zip(self.segments, self.segment_counts):
+            if position < count:
+                with self._mapped(number) as buffer:
+                    values = RECORD.unpack_from(buffer, position * RECORD.size)
+                return decode_ride(values, self._strings_of(number))
+            position -= count
+
+    def records(self, reverse=False, user_filter=None):
+        """
+        Yields the stored rides one at a time, oldest first or latest first.
+
+        Only one segment is mapped at a time and records are decoded lazily.
+
+        Args:
+            reverse (bool): Yield the latest ride first.
+            user_filter (callable, optional): Called with the user_id of each record
+                before it is decoded; records for which it returns False are skipped.
+        """
+        for buffer, offset, strings in self._offsets(reverse):
+            if user_filter is not None:
+                flags, user_id = _USER_FIELD.unpack_from(buffer, offset)
+                if not user_filter(_decode_id(user_id, flags & _USER_INT, strings)):
+                    continue
+            yield decode_ride(RECORD.unpack_from(buffer, offset), strings)
+
+    def _offsets(self, reverse):
+        """Yields (mapped segment, byte offset, string file reader) for every record."""
+        self.flush()
+        segments = list(zip(self.segments, self.segment_counts))
+        if reverse:
+            segments.reverse()
+        for number, count in segments:
+            # A record counted by a concurrent append may not be flushed yet
+            count = min(count, self._stored_records(number))
+            if count == 0:
+                continue
+            strings = self._strings_of(number)
+            with self._mapped(number) as buffer:
+                positions = range(count - 1, -1, -1) if reverse else range(count)
+                for position in positions:
+                    yield buffer, position * RECORD.size, strings
+
+    def _mapped(self, number):
+        with open(self._path(number), "rb") as f:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def _strings_of(self, number):
+        """Returns a reader of long text in a segment's string file: (offset, length) -> bytes."""
+        def read(offset, length):
+            # One handle per segment, opened once a record needs it and kept until close()
+            reader = self._string_readers.get(number)
+            if reader is None:
+                reader = open(self._path(number, _STRINGS_FORMAT), "rb")
+                kept = self._string_readers.setdefault(number, reader)
+                if kept is not reader:  # another thread opened it first
+                    reader.close()
+                    reader = kept
+            return os.pread(reader.fileno(), length, offset)
+        return read
+
+    def _store_text(self, data):
+        """Appends long text to the current string file and returns its offset."""
+        offset = self._strings_size
+        self._strings.write(data)
+        self._strings_size += len(data)
+        return offset
+
+    def _open_strings(self):
+        # Unbuffered, so text always reaches the file before the record that refers to it
+        path = self._path(self.segments[-1], _STRINGS_FORMAT)
+        self._strings = open(path, "ab", buffering=0)
+        self._strings_size = os.path.getsize(path)
+
+    def _rotate(self):
+        self.sync()
+        self._file.close()
+        self._strings.close()
+        self.segments.append(self.segments[-1] + 1)
+        self.segment_counts.append(0)
+        self._file = open(self._path(self.segments[-1]), "ab")
+        self._open_strings()
+
+    def _stored_records(self, number):
+        return os.path.getsize(self._path(number)) // RECORD.size
+
+    def _path(self, number, name_format=_SEGMENT_FORMAT):
+        return os.path.join(self.directory, name_format.format(number))
+
+
+def encode_ride(ride_log, store_text=None):
+    """
+    Packs a RideLog into a fixed-width record.
+
+    Args:
+        ride_log (RideLog): The ride to pack.
+        store_text (callable, optional): Called with the UTF-8 bytes of a text
+            field longer than its slot; stores them elsewhere and returns their offset.
+
+    Raises:
+        ValueError: If a text field does not fit its slot and no store_text is given.
+    """
+    flags = 0
+    if isinstance(ride_log.user_id, int):
+        flags |= _USER_INT
+    if isinstance(ride_log.vehicle_id, int):
+        flags |= _VEHICLE_INT
+    if isinstance(ride_log.ride_id, int):
+        flags |= _RIDE_INT
+    pickup_geo = ride_log.pickup_geo
+    location_geo = ride_log.location_geo
+    destination_geo = ride_log.destination_geo
+    if pickup_geo is not None:
+        flags |= _PICKUP_GEO
+    else:
+        pickup_geo = (0.0, 0.0)
+    if location_geo is not None:
+        flags |= _LOCATION_GEO
+    else:
+        location_geo = (0.0, 0.0)
+    if destination_geo is not None:
+        flags |= _DESTINATION_GEO
+    else:
+        destination_geo = (0.0, 0.0)
+    return RECORD.pack(
+        flags,
+        _encode_text(ride_log.ride_id, 40, store_text),
+        _encode_text(ride_log.user_id, 32, store_text),
+        _encode_text(ride_log.vehicle_id, 32, store_text),
+        _encode_text(ride_log.location, 48, store_text),
+        _encode_text(ride_log.vehicle_type, 16, store_text),
+        _encode_text(ride_log.pickup, 48, store_text),
+        _encode_text(ride_log.destination, 48, store_text),
+        float(ride_log.rating),
+        float(pickup_geo[0]), float(pickup_geo[1]),
+        float(location_geo[0]), float(location_geo[1]),
+        float(destination_geo[0]), float(destination_geo[1]),
+    )
+
+
+def decode_ride(values, strings=None):
+    """
+    Rebuilds a RideLog from the unpacked fields of a record.
+
+    Args:
+        values (tuple): Fields unpacked with RECORD.
+        strings (callable, optional): Reads long text, (offset, length) -> bytes.
+    """
+    (flags, ride_id, user_id, vehicle_id, location, vehicle_type, pickup, destination, rating,
+     pickup_lat, pickup_lon, location_lat, location_lon, destination_lat, destination_lon) = values
+    return RideLog(
+        ride_id=_decode_id(ride_id, flags & _RIDE_INT, strings),
+        user_id=_decode_id(user_id, flags & _USER_INT, strings),
+        vehicle_id=_decode_id(vehicle_id, flags & _VEHICLE_INT, strings),
+        location=_decode_text(location, strings),
+        rating=rating,
+        vehicle_type=_decode_text(vehicle_type, strings),
+        pickup=_decode_text(pickup, strings),
+        pickup_geo=(pickup_lat, pickup_lon) if flags & _PICKUP_GEO else None,
+        location_geo=(location_lat, location_lon) if flags & _LOCATION_GEO else None,
+        destination=_decode_text(destination, strings),
+        destination_geo=(destination_lat, destination_lon) if flags & _DESTINATION_GEO else None,
+    )
+
+
+def _encode_text(value, width, store_text=None):
+    if value is None:
+        return b""
+    data = str(value).encode("utf-8")
+    if len(data) > width:
+        if store_text is None:
+            raise ValueError(f"{value!r} is longer than {width} bytes")
+        data = bytes([_LONG_TEXT]) + _TEXT_REF.pack(store_text(data), len(data))[1:]
+    return data
+
+
+def _read_text(data, strings):
+    if data[0] == _LONG_TEXT:
+        if strings is None:
+            raise ValueError("record refers to a string file that was not given")
+        offset, length = _TEXT_REF.unpack_from(data)
+        return strings(offset, length).decode("utf-8")
+    return data.rstrip(b"\0").decode("utf-8")
+
+
+def _decode_text(data, strings=None):
+    text = _read_text(data, strings)
+    return text or None
+
+
+def _decode_id(data, is_int, strings=None):
+    text = _read_text(data, strings)
+    return int(text) if is_int else text
@@ -1,60 +1,367 @@
-from collections import deque
-
-class RideRequest:
-    """
-    Represents a user's request for a ride.
-
-    Attributes:
-        user_id (str): ID of the user requesting the ride.
-        location (str): Pickup location.
-        location_geo (str): Geographical coordinates of the pickup location.
-        destination (str): Drop-off location.
-        destination_geo (str): Geographical coordinates of the drop-off location.
-        vehicle_type (str): Preferred type of vehicle.
-    """
-
-    def __init__(self, user_id, location, location_geo, destination, destination_geo, vehicle_type):
-        """
-        Initialize a ride request with pickup and drop-off details.
-
-        Args:
-            user_id (str): ID of the user making the request.
-            location (str): Pickup location.
-            location_geo (str): Pickup geographic coordinates.
-            destination (str): Drop-off location.
-            destination_geo (str): Drop-off geographic coordinates.
-            vehicle_type (str): Preferred vehicle type for the ride.
-
-        Example:
-            >>> RideRequest("U123", "Dubai Marina", (25.0772, 55.1330), "Dubai Mall", (25.1975, 55.2790), "car")
-        """
-        self.user_id = user_id
-        self.location = location
-        self.location_geo = location_geo
-        self.destination = destination
-        self.destination_geo = destination_geo
-        self.vehicle_type = vehicle_type
-
-class RideRequestQueue:
-    """
-    Manages pending ride requests using a queue (FIFO).
-
-    Example:
-        queue = RideRequestQueue()
-        queue.add_request(ride)
-        queue.process_next_request()
-    """
-    def __init__(self):
-        self.queue = deque()
-
-    def add_request(self, ride):
-        """Adds a new ride request to the queue."""
-        self.queue.append(ride)
-
-    def process_next_request(self):
-        """Processes the next ride request (FIFO)."""
-        return self.queue.popleft() if self.queue else None
-
-    def pending_requests(self):
-        """Returns all pending ride requests."""
-        return list(self.queue)
+import math
+import pickle
+import tempfile
+import threading
+import time
+from collections import deque
+from geo_utils import parse_geo
+
+class RideRequest:
+    """
+    Represents a user's request for a ride.
+
+    Attributes:
+        user_id (str): ID of the user requesting the ride.
+        location (str): Pickup location.
+        location_geo (tuple): Pickup coordinates as floats, or None if invalid.
+        destination (str): Drop-off location.
+        destination_geo (tuple): Drop-off coordinates as floats, or None if invalid.
+        vehicle_type (str): Preferred type of vehicle.
+        priority (int): Priority class; higher is dispatched first.
+        requested_at (float): Time the request entered the queue.
+        attempts (int): Dispatch attempts that found no vehicle (see RideRequestQueue.requeue).
+    """
+    __slots__ = ("user_id", "location", "location_geo", "destination", "destination_geo", "vehicle_type",
+                 "priority", "requested_at", "attempts")
+
+    def __init__(self, user_id, location, location_geo, destination, destination_geo, vehicle_type,
+                 priority=0):
+        """
+        Initialize a ride request with pickup and drop-off details.
+
+        Args:
+            user_id (str): ID of the user making the request.
+            location (str): Pickup location.
+            location_geo (str): Pickup geographic coordinates.
+            destination (str): Drop-off location.
+            destination_geo (str): Drop-off geographic coordinates.
+            vehicle_type (str): Preferred vehicle type for the ride.
+            priority (int, optional): Priority class; higher is served first
+                (e.g., 0 standard, 1 premium, 2 accessibility).
+
+        Example:
+            >>> RideRequest("U123", "Dubai Marina", (25.0772, 55.1330), "Dubai Mall", (25.1975, 55.2790), "car")
+        """
+        self.user_id = user_id
+        self.location = location
+        self.location_geo = parse_geo(location_geo)
+        self.destination = destination
+        self.destination_geo = parse_geo(destination_geo)
+        self.vehicle_type = vehicle_type
+        self.priority = priority
+        self.requested_at = None  # set by RideRequestQueue when first queued
+        self.attempts = 0
+
+class RideRequestQueue:
+    """
+    Manages pending ride requests in bounded FIFO lanes, one per priority class.
+
+    Requests are served from the highest priority lane first and in arrival
+    order within a lane. When `capacity` requests are pending, the overflow
+    policy decides what happens to a new one:
+
+    - "reject": add_request returns False and the request is not queued.
+    - "drop-oldest": the oldest request of the lowest priority lane is dropped,
+      unless the new request has an even lower priority: then the new request
+      is dropped instead, so a lower class never evicts a higher one.
+    - "spill": each lane overflows into its own temporary file and requests
+      re-enter their lane, in arrival order, as room frees up, highest priority
+      first. A request of a higher priority than the lowest lane in memory is
+      still admitted: the newest request of that lane is spilled to make room.
+
+    Requests that were dequeued but found no vehicle are put back with
+    requeue(). After `max_attempts` failed attempts a request is dead-lettered
+    instead, so one that can never be served does not circulate forever.
+
+    The queue also tracks its depth and the time requests waited before being
+    dequeued, reported by stats().
+
+    Adding and removing requests is serialized by `lock`, so request handlers
+    on several threads can share one queue.
+
+    Example:
+        queue = RideRequestQueue(capacity=10000, overflow="drop-oldest")
+        queue.add_request(ride)
+        queue.process_next_request()
+        batch = queue.drain(64)
+    """
+    OVERFLOW_POLICIES = ("reject", "drop-oldest", "spill")
+
+    def __init__(self, capacity=None, overflow="reject", wait_samples=1024, clock=time.monotonic,
+                 max_attempts=None):
+        """
+        Args:
+            capacity (int, optional): Maximum number of requests held in memory; None for no limit.
+            overflow (str): 'reject', 'drop-oldest' or 'spill'.
+            max_attempts (int, optional): Failed dispatch attempts after which requeue()
+                dead-letters a request; None requeues it forever.
+            wait_samples (int): Number of recent wait times kept for the percentiles.
+            clock (callable): Returns the current time in seconds.
+        """
+        if overflow not in self.OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy: {overflow!r}")
+        self.capacity = capacity
+        self.overflow = overflow
+        self.max_attempts = max_attempts
+        self.clock = clock
+        self.lanes = {}  # priority -> deque of RideRequest
+        self.priorities = []  # lane priorities, highest first
+        self.size = 0
+        self.spills = {}  # priority -> _SpillLane holding the tail of that lane
+        self.spilled = 0
+        self.waits = deque(maxlen=wait_samples)
+        self.enqueued = 0
+        self.dequeued = 0
+        self.rejected = 0
+        self.dropped = 0
+        self.dead_lettered = 0
+        self.max_depth = 0
+        self.lock = threading.RLock()
+
+    def __len__(self):
+        return self.size + self.spilled
+
+    def __iter__(self):
+        """Iterates over a snapshot of the in-memory pending requests, in service order."""
+        with self.lock:
+            pending = [ride for priority in self.priorities for ride in self.lanes[priority]]
+        return iter(pending)
+
+    def add_request(self, ride):
+        """
+        Adds a new ride request to its priority lane.
+
+        Returns:
+            bool: False if the queue is full and the request was rejected or
+            dropped in favour of higher priority requests.
+        """
+        with self.lock:
+            if ride.requested_at is None:
+                ride.requested_at = self.clock()
+            if self.capacity is not None and self.size >= self.capacity:
+                if self.overflow == "reject":
+                    self.rejected += 1
+                    return False
+                lowest = self._lowest_lane()
+                if self.overflow == "spill":
+                    spill = self.spills.get(ride.priority)
+                    if lowest is None or ride.priority <= lowest or spill:
+                        # Behind the requests of its lane already on disk
+                        self._spill(ride)
+                        self.enqueued += 1
+                        return True
+                    self._demote(lowest)
+                elif lowest is not None and ride.priority < lowest:
+                    self.dropped += 1
+                    return False
+                else:
+                    self._drop_oldest()
+            self._lane(ride.priority).append(ride)
+            self.size += 1
+            self.enqueued += 1
+            self.max_depth = max(self.max_depth, len(self))
+            return True
+
+    def requeue(self, rides):
+        """
+        Puts requests that found no vehicle back at the front of their lanes.
+
+        Requeued requests keep their place and original request time and are not
+        subject to the capacity limit, since they were already admitted. Each
+        call counts as a failed attempt for every request; a request reaching
+        `max_attempts` is dead-lettered instead of requeued.
+
+        Args:
+            rides (list): Requests taken with process_next_request() or drain().
+
+        Returns:
+            list: The dead-lettered requests, which are no longer queued.
+        """
+        with self.lock:
+            dead = []
+            for ride in reversed(rides):
+                ride.attempts += 1
+                if self.max_attempts is not None and ride.attempts >= self.max_attempts:
+                    dead.append(ride)
+                    self.dead_lettered += 1
+                    continue
+                self._lane(ride.priority).appendleft(ride)
+                self.size += 1
+                self.dequeued -= 1
+            dead.reverse()
+            return dead
+
+    def process_next_request(self):
+        """Processes the next ride request (highest priority, then FIFO)."""
+        with self.lock:
+            for priority in self.priorities:
+                lane = self.lanes[priority]
+                if lane:
+                    ride = lane.popleft()
+                    self.size -= 1
+                    self.dequeued += 1
+                    self.waits.append(self.clock() - ride.requested_at)
+                    self._refill()
+                    return ride
+            return None
+
+    def drain(self, max_n=None):
+        """
+        Removes and returns up to max_n pending requests in service order.
+
+        Args:
+            max_n (int, optional): Maximum batch size; None drains everything.
+
+        Returns:
+            list: The dequeued requests.
+        """
+        with self.lock:
+            batch = []
+            while max_n is None or len(batch) < max_n:
+                ride = self.process_next_request()
+                if ride is None:
+                    break
+                batch.append(ride)
+            return batch
+
+    def pending_requests(self):
+        """Returns an iterator over a snapshot of the in-memory pending requests (spilled ones are not included)."""
+        return iter(self)
+
+    def wait_percentiles(self, percentiles=(50, 90, 99)):
+        """
+        Returns the recent queue wait times at the given percentiles.
+
+        Returns:
+            dict: Maps each percentile to a wait in seconds (nearest-rank), or None without samples.
+        """
+        with self.lock:
+            samples = sorted(self.waits)
+        result = {}
+        for p in percentiles:
+            if not samples:
+                result[p] = None
+            else:
+                result[p] = samples[max(0, math.ceil(p / 100.0 * len(samples)) - 1)]
+        return result
+
+    def stats(self):
+        """
+        Returns queue depth, overflow counters and wait-time percentiles.
+
+        Example:
+            >>> queue.stats()["wait_p99"]
+        """
+        with self.lock:
+            stats = {
+                "depth": len(self),
+                "in_memory": self.size,
+                "spilled": self.spilled,
+                "depth_by_priority": {p: len(self.lanes[p]) + len(self.spills.get(p, ()))
+                                      for p in self.priorities},
+                "capacity": self.capacity,
+                "max_depth": self.max_depth,
+                "enqueued": self.enqueued,
+                "dequeued": self.dequeued,
+                "rejected": self.rejected,
+                "dropped": self.dropped,
+                "dead_lettered": self.dead_lettered,
+            }
+            for p, wait in self.wait_percentiles().items():
+                stats[f"wait_p{p}"] = wait
+            return stats
+
+    def _lane(self, priority):
+        lane = self.lanes.get(priority)
+        if lane is None:
+            lane = self.lanes[priority] = deque()
+            self.priorities.append(priority)
+            self.priorities.sort(reverse=True)
+        return lane
+
+    def _lowest_lane(self):
+        """Returns the lowest priority with requests in memory, or None."""
+        for priority in reversed(self.priorities):
+            if self.lanes[priority]:
+                return priority
+        return None
+
+    def _drop_oldest(self):
+        """Drops the oldest request of the lowest priority non-empty lane."""
+        for priority in reversed(self.priorities):
+            lane = self.lanes[priority]
+            if lane:
+                lane.popleft()
+                self.size -= 1
+                self.dropped += 1
+                return
+
+    def _spill(self, ride):
+        """Appends a request to the on-disk tail of its lane."""
+        self._spill_lane(ride.priority).append(ride)
+        self.spilled += 1
+        self.max_depth = max(self.max_depth, len(self))
+
+    def _spill_lane(self, priority):
+        spill = self.spills.get(priority)
+        if spill is None:
+            self._lane(priority)
+            spill = self.spills[priority] = _SpillLane()
+        return spill
+
+    def _demote(self, priority):
+        """Moves the newest in-memory request of a lane to the front of its on-disk tail."""
+        ride = self.lanes[priority].pop()
+        self.size -= 1
+        self._spill_lane(priority).push_front(ride)
+        self.spilled += 1
+
+    def _refill(self):
+        """Moves spilled requests back into memory while there is room, highest priority first."""
+        if not self.spilled:
+            return
+        for priority in self.priorities:
+            spill = self.spills.get(priority)
+            while spill and self.size < self.capacity:
+                self.lanes[priority].append(spill.pop_front())
+                self.spilled -= 1
+                self.size += 1
+            if self.size >= self.capacity:
+                return
+
+
+class _SpillLane:
+    """
+    Temporary file of pickled requests, read back in order from the front.
+
+    Only the file offsets of the requests are kept in memory. push_front()
+    lets a request that was in memory go back ahead of the ones on disk.
+    """
+
+    def __init__(self):
+        self.file = tempfile.TemporaryFile()
+        self.offsets = deque()
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def append(self, ride):
+        self.offsets.append(self._write(ride))
+
+    def push_front(self, ride):
+        self.offsets.appendleft(self._write(ride))
+
+    def pop_front(self):
+        self.file.seek(self.offsets.popleft())
+        ride = pickle.load(self.file)
+        if not self.offsets:
+            # Everything was read back: reuse the file from the start
+            self.file.seek(0)
+            self.file.truncate()
+        return ride
+
+    def _write(self, ride):
+        self.file.seek(0, 2)
+        offset = self.file.tell()
+        pickle.dump(ride, self.file, pickle.HIGHEST_PROTOCOL)
+        return offset
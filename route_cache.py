@@ -0,0 +1,170 @@
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+
+class RouteCache:
+    """
+    Bounded LRU cache of shortest-path results keyed by (start, end).
+
+    Entries are evicted least recently used first once either the entry limit or
+    the (estimated) byte limit is exceeded, and expire after `ttl` seconds. Each
+    entry remembers the graph version it was computed for, so bumping the graph
+    version invalidates everything at once in O(1). An edge -> entries index lets
+    a single road change drop exactly the routes that use that road.
+
+    The cache is safe to share between threads: every public method holds
+    `lock`, so lookups (which reorder the LRU) never race invalidations or
+    evictions.
+
+    Attributes:
+        max_entries (int): Maximum number of cached routes; 0 disables caching.
+        max_bytes (int): Optional limit on the estimated memory of cached routes.
+        ttl (float): Seconds a route stays valid; None keeps routes until evicted.
+        hits, misses, evictions, invalidations (int): Usage counters.
+        lock (threading.RLock): Guards the entries, the edge index and the counters.
+
+    Example:
+        cache = RouteCache(max_entries=1000)
+        cache.put(("A", "C"), 7.0, ["A", "B", "C"], version=0)
+        cache.get(("A", "C"), version=0)  # (7.0, ['A', 'B', 'C'])
+        cache.invalidate_edge("A", "B")
+        cache.get(("A", "C"), version=0)  # None
+    """
+
+    def __init__(self, max_entries=1024, max_bytes=None, ttl=None, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.clock = clock
+        self.entries = OrderedDict()  # key -> (distance, path, version, stored_at, size)
+        self.edge_index = {}  # frozenset({a, b}) -> set of keys whose path uses that road
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.lock = threading.RLock()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key, version):
+        """
+        Returns a cached route, or None on a miss.
+
+        Args:
+            key (tuple): (start, end) locations.
+            version (int): Current graph version; routes from older versions are discarded.
+
+        Returns:
+            tuple or None: (distance, path) or None.
+        """
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                distance, path, entry_version, stored_at, _ = entry
+                if entry_version == version and (self.ttl is None or self.clock() - stored_at <= self.ttl):
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    return distance, path
+                self._drop(key)
+            self.misses += 1
+            return None
+
+    def put(self, key, distance, path, version):
+        """
+        Stores a route, evicting the least recently used ones if over the limits.
+
+        Args:
+            key (tuple): (start, end) locations.
+            distance (float): Route distance.
+            path (list): Locations along the route.
+            version (int): Graph version the route was computed for.
+        """
+        with self.lock:
+            if self.max_entries <= 0:
+                return
+            if key in self.entries:
+                self._drop(key)
+            size = self._estimate_size(path)
+            self.entries[key] = (distance, path, version, self.clock(), size)
+            self.bytes += size
+            for edge in self._edges(path):
+                self.edge_index.setdefault(edge, set()).add(key)
+
+            while self.entries and (
+                len(self.entries) > self.max_entries
+                or self.max_bytes is not None and self.bytes > self.max_bytes
+            ):
+                self._drop(next(iter(self.entries)))
+                self.evictions += 1
+
+    def invalidate_edge(self, from_location, to_location):
+        """
+        Drops every cached route that travels the road between two locations.
+
+        Args:
+            from_location (str): One end of the road.
+            to_location (str): The other end of the road.
+
+        Returns:
+            int: Number of routes dropped.
+        """
+        with self.lock:
+            keys = self.edge_index.get(frozenset((from_location, to_location)), ())
+            keys = list(keys)
+            for key in keys:
+                self._drop(key)
+            self.invalidations += len(keys)
+            return len(keys)
+
+    def clear(self):
+        """Drops every cached route."""
+        with self.lock:
+            self.invalidations += len(self.entries)
+            self.entries.clear()
+            self.edge_index.clear()
+            self.bytes = 0
+
+    def stats(self):
+        """
+        Returns the cache counters.
+
+        Returns:
+            dict: entries, bytes, hits, misses, hit_rate, evictions and invalidations.
+        """
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self.entries),
+                "bytes": self.bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+    def _drop(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return
+        distance, path, version, stored_at, size = entry
+        self.bytes -= size
+        for edge in self._edges(path):
+            keys = self.edge_index.get(edge)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.edge_index[edge]
+
+    @staticmethod
+    def _edges(path):
+        return {frozenset(pair) for pair in zip(path, path[1:])}
+
+    @staticmethod
+    def _estimate_size(path):
+        """Rough footprint of an entry: the path list, its tuple, and the edge index slots."""
+        return sys.getsizeof(path) + 200 + 150 * len(path)
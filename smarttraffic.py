@@ -1,92 +1,317 @@
-import heapq
-
-class TrafficVehicle:
-    """
-    Represents a vehicle and its traffic delay.
-
-    Attributes:
-        vehicle_id (str): Unique identifier for the vehicle.
-        delay (int): Traffic delay in minutes.
-
-    Example:
-        vehicle = TrafficVehicle("V123", 8)
-        print(vehicle)  # Output: Vehicle(V123, Delay: 8min)
-    """
-    def __init__(self, vehicle_id, delay):
-        self.vehicle_id = vehicle_id
-        self.delay = delay
-
-    def __lt__(self, other):
-        return self.delay < other.delay
-
-    def __repr__(self):
-        return f"Vehicle({self.vehicle_id}, Delay: {self.delay}min)"
-
-
-class TrafficManager:
-    """
-    Manages traffic delays using a min-heap to prioritize vehicles with the least delay.
-
-    Example:
-        tm = TrafficManager()
-        tm.add_vehicle("V101", 10)
-        tm.add_vehicle("V102", 5)
-        next_vehicle = tm.get_next_vehicle()
-        print(next_vehicle)  # Output: Vehicle(V102, Delay: 5min)
-    """
-    def __init__(self):
-        self.heap = []
-        self.vehicle_map = {}  # Maps vehicle_id to TrafficVehicle for quick updates
-
-    def add_vehicle(self, vehicle_id, delay):
-        """
-        Adds a vehicle with its current delay to the heap.
-
-        Args:
-            vehicle_id (str): Unique ID for the vehicle.
-            delay (int): Traffic delay in minutes.
-
-        Example:
-            tm.add_vehicle("V201", 12)
-        """
-        vehicle = TrafficVehicle(vehicle_id, delay)
-        heapq.heappush(self.heap, vehicle)
-        self.vehicle_map[vehicle_id] = vehicle
-
-    def update_vehicle_delay(self, vehicle_id, new_delay):
-        """
-        Updates a vehicle's delay by removing and reinserting it into the heap.
-
-        Args:
-            vehicle_id (str): ID of the vehicle to update.
-            new_delay (int): New delay value.
-
-        Example:
-            tm.update_vehicle_delay("V201", 7)
-        """
-        if vehicle_id in self.vehicle_map:
-            # Rebuild heap without the old record
-            self.heap = [v for v in self.heap if v.vehicle_id != vehicle_id]
-            heapq.heapify(self.heap)
-
-        # Add updated vehicle
-        self.add_vehicle(vehicle_id, new_delay)
-
-    def get_next_vehicle(self):
-        """
-        Returns the vehicle with the least traffic delay.
-
-        Returns:
-            TrafficVehicle or None: Vehicle object with lowest delay, or None if heap is empty.
-
-        Example:
-            vehicle = tm.get_next_vehicle()
-            if vehicle:
-                print(vehicle.vehicle_id)
-        """
-        while self.heap:
-            vehicle = heapq.heappop(self.heap)
-            if vehicle.vehicle_id in self.vehicle_map:
-                del self.vehicle_map[vehicle.vehicle_id]
-                return vehicle
-        return None
+import heapq
+import threading
+import time
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; get_delays then returns a list
+    np = None
+
+class TrafficVehicle:
+    """
+    Represents a vehicle and its traffic delay.
+
+    Attributes:
+        vehicle_id (str): Unique identifier for the vehicle.
+        delay (int): Traffic delay in minutes.
+
+    Example:
+        vehicle = TrafficVehicle("V123", 8)
+        print(vehicle)  # Output: Vehicle(V123, Delay: 8min)
+    """
+    __slots__ = ("vehicle_id", "delay")
+
+    def __init__(self, vehicle_id, delay):
+        self.vehicle_id = vehicle_id
+        self.delay = delay
+
+    def __lt__(self, other):
+        return self.delay < other.delay
+
+    def __repr__(self):
+        return f"Vehicle({self.vehicle_id}, Delay: {self.delay}min)"
+
+
+class TrafficManager:
+    """
+    Manages traffic delays using a min-heap to prioritize vehicles with the least delay.
+
+    The heap is indexed: `position` maps each vehicle_id to its slot in the heap,
+    so a vehicle's delay can be updated or removed in O(log N) without scanning.
+
+    Every reported delay is also kept in a flat store that dispatch reads with
+    get_delay / get_delays in O(1) per vehicle without touching the heap. Delays
+    older than `ttl` seconds are treated as unknown and read back as the default.
+
+    Updates are serialized by `lock`, so traffic feeds can report from several
+    threads; get_delay / get_delays read single dict entries and never block.
+
+    Attributes:
+        heap (list): TrafficVehicle entries in binary min-heap order.
+        vehicle_map (dict): Maps vehicle_id to its TrafficVehicle.
+        position (dict): Maps vehicle_id to the entry's index in `heap`.
+        delays (dict): Maps vehicle_id to (delay, time it was reported).
+        ttl (float): Seconds a reported delay stays valid; None keeps delays forever.
+
+    Example:
+        tm = TrafficManager()
+        tm.add_vehicle("V101", 10)
+        tm.add_vehicle("V102", 5)
+        next_vehicle = tm.get_next_vehicle()
+        print(next_vehicle)  # Output: Vehicle(V102, Delay: 5min)
+    """
+    def __init__(self, ttl=300, clock=time.monotonic):
+        self.heap = []
+        self.vehicle_map = {}  # Maps vehicle_id to TrafficVehicle for quick updates
+        self.position = {}  # Maps vehicle_id to its index in the heap
+        self.delays = {}  # Maps vehicle_id to (delay, reported_at)
+        self.ttl = ttl
+        self.clock = clock
+        self.lock = threading.RLock()  # guards the heap; get_delay/get_delays read without it
+
+    def __len__(self):
+        return len(self.heap)
+
+    def __contains__(self, vehicle_id):
+        return vehicle_id in self.position
+
+    def add_vehicle(self, vehicle_id, delay):
+        """
+        Adds a vehicle with its current delay to the heap.
+
+        A vehicle that is already tracked has its delay updated instead.
+
+        Args:
+            vehicle_id (str): Unique ID for the vehicle.
+            delay (int): Traffic delay in minutes.
+
+        Example:
+            tm.add_vehicle("V201", 12)
+        """
+        with self.lock:
+            if vehicle_id in self.position:
+                self.update_vehicle_delay(vehicle_id, delay)
+                return
+            self.delays[vehicle_id] = (delay, self.clock())
+            vehicle = TrafficVehicle(vehicle_id, delay)
+            self.vehicle_map[vehicle_id] = vehicle
+            self.position[vehicle_id] = len(self.heap)
+            self.heap.append(vehicle)
+            self._sift_up(len(self.heap) - 1)
+
+    def update_vehicle_delay(self, vehicle_id, new_delay):
+        """
+        Updates a vehicle's delay in place and restores the heap order in O(log N).
+
+        Args:
+            vehicle_id (str): ID of the vehicle to update.
+            new_delay (int): New delay value.
+
+        Example:
+            tm.update_vehicle_delay("V201", 7)
+        """
+        with self.lock:
+            index = self.position.get(vehicle_id)
+            if index is None:
+                self.add_vehicle(vehicle_id, new_delay)
+                return
+
+            self.delays[vehicle_id] = (new_delay, self.clock())
+            vehicle = self.heap[index]
+            old_delay = vehicle.delay
+            vehicle.delay = new_delay
+            if new_delay < old_delay:
+                self._sift_up(index)
+            elif new_delay > old_delay:
+                self._sift_down(index)
+
+    def update_many(self, updates):
+        """
+        Applies a batch of delay updates, e.g. a full traffic feed.
+
+        Large batches are written in place and the heap is rebuilt once with
+        heapify (O(N)); small batches fall back to per-vehicle O(log N) updates.
+
+        Args:
+            updates (iterable): (vehicle_id, delay) pairs.
+
+        Example:
+            tm.update_many([("V201", 7), ("V202", 3)])
+        """
+        with self.lock:
+            updates = list(updates)
+            if len(updates) * max(len(self.heap), 2).bit_length() < len(self.heap):
+                for vehicle_id, delay in updates:
+                    self.update_vehicle_delay(vehicle_id, delay)
+                return
+
+            now = self.clock()
+            for vehicle_id, delay in updates:
+                self.delays[vehicle_id] = (delay, now)
+                vehicle = self.vehicle_map.get(vehicle_id)
+                if vehicle is None:
+                    vehicle = TrafficVehicle(vehicle_id, delay)
+                    self.vehicle_map[vehicle_id] = vehicle
+                    self.heap.append(vehicle)
+                else:
+                    vehicle.delay = delay
+            heapq.heapify(self.heap)
+            self.position = {vehicle.vehicle_id: i for i, vehicle in enumerate(self.heap)}
+
+    def remove_vehicle(self, vehicle_id):
+        """
+        Stops tracking a vehicle's delay.
+
+        Args:
+            vehicle_id (str): ID of the vehicle to remove.
+
+        Returns:
+            TrafficVehicle or None: The removed entry, or None if it was not tracked.
+        """
+        with self.lock:
+            self.delays.pop(vehicle_id, None)
+            index = self.position.get(vehicle_id)
+            if index is None:
+                return None
+            return self._remove_at(index)
+
+    def update_traffic(self, vehicle_id, delay):
+        """
+        Records the latest traffic delay reported for a vehicle.
+
+        Args:
+            vehicle_id (str): ID of the vehicle.
+            delay (float): Delay in minutes.
+        """
+        self.update_vehicle_delay(vehicle_id, delay)
+
+    def get_delay(self, vehicle_id, default=0):
+        """
+        Returns a vehicle's current delay without modifying the heap.
+
+        Args:
+            vehicle_id (str): ID of the vehicle.
+            default (float): Value returned when no fresh delay is known.
+
+        Returns:
+            float: The delay in minutes, or `default` if unknown or expired.
+
+        Example:
+            tm.get_delay("V201")  # 7
+        """
+        entry = self.delays.get(vehicle_id)
+        if entry is None:
+            return default
+        if self.ttl is not None and self.clock() - entry[1] > self.ttl:
+            return default
+        return entry[0]
+
+    def get_delays(self, vehicle_ids, default=0):
+        """
+        Returns the current delays of many vehicles, aligned with `vehicle_ids`.
+
+        Args:
+            vehicle_ids (iterable): IDs of the vehicles, e.g. a dispatcher's candidate list.
+            default (float): Value used for vehicles without a fresh delay.
+
+        Returns:
+            numpy.ndarray or list: One delay per vehicle (a list when NumPy is unavailable).
+
+        Example:
+            tm.get_delays(["V201", "V999"])  # array([7., 0.])
+        """
+        oldest = None if self.ttl is None else self.clock() - self.ttl
+        missing = (default, float("-inf"))
+        lookup = self.delays.get
+        values = []
+        for vehicle_id in vehicle_ids:
+            delay, reported_at = lookup(vehicle_id, missing)
+            values.append(default if oldest is not None and reported_at < oldest else delay)
+        if np is not None:
+            return np.asarray(values, dtype=np.float64)
+        return values
+
+    def expire_stale(self):
+        """
+        Drops every delay older than `ttl`, from both the store and the heap.
+
+        Returns:
+            int: Number of vehicles dropped.
+        """
+        with self.lock:
+            if self.ttl is None:
+                return 0
+            oldest = self.clock() - self.ttl
+            stale = [vehicle_id for vehicle_id, (_, reported_at) in self.delays.items() if reported_at < oldest]
+            for vehicle_id in stale:
+                self.remove_vehicle(vehicle_id)
+            return len(stale)
+
+    def peek_next_vehicle(self):
+        """
+        Returns the vehicle with the least traffic delay without removing it.
+
+        Returns:
+            TrafficVehicle or None: Vehicle object with lowest delay, or None if heap is empty.
+        """
+        with self.lock:
+            return self.heap[0] if self.heap else None
+
+    def get_next_vehicle(self):
+        """
+        Returns the vehicle with the least traffic delay.
+
+        Returns:
+            TrafficVehicle or None: Vehicle object with lowest delay, or None if heap is empty.
+
+        Example:
+            vehicle = tm.get_next_vehicle()
+            if vehicle:
+                print(vehicle.vehicle_id)
+        """
+        with self.lock:
+            return self._remove_at(0) if self.heap else None
+
+    def _remove_at(self, index):
+        """Removes the heap entry at `index` by swapping in the last entry."""
+        vehicle = self.heap[index]
+        last = self.heap.pop()
+        del self.position[vehicle.vehicle_id]
+        del self.vehicle_map[vehicle.vehicle_id]
+        if last is not vehicle:
+            self.heap[index] = last
+            self.position[last.vehicle_id] = index
+            self._sift_up(index)
+            self._sift_down(self.position[last.vehicle_id])
+        return vehicle
+
+    def _sift_up(self, index):
+        heap = self.heap
+        vehicle = heap[index]
+        while index > 0:
+            parent = (index - 1) >> 1
+            if not vehicle < heap[parent]:
+                break
+            heap[index] = heap[parent]
+            self.position[heap[index].vehicle_id] = index
+            index = parent
+        heap[index] = vehicle
+        self.position[vehicle.vehicle_id] = index
+
+    def _sift_down(self, index):
+        heap = self.heap
+        size = len(heap)
+        vehicle = heap[index]
+        while True:
+            child = 2 * index + 1
+            if child >= size:
+                break
+            if child + 1 < size and heap[child + 1] < heap[child]:
+                child += 1
+            if not heap[child] < vehicle:
+                break
+            heap[index] = heap[child]
+            self.position[heap[index].vehicle_id] = index
+            index = child
+        heap[index] = vehicle
+        self.position[vehicle.vehicle_id] = index
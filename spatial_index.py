@@ -0,0 +1,201 @@
+import heapq
+import math
+import threading
+from collections import defaultdict
+from geo_utils import EARTH_RADIUS_KM, haversine, parse_geo
+
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180.0
+
+
+class GridSpatialIndex:
+    """
+    Uniform grid over (latitude, longitude) for nearest-neighbour and radius queries.
+
+    Items are bucketed by the grid cell that contains them. Queries start at the
+    cell of the query point and expand ring by ring, stopping as soon as no
+    unvisited ring can hold a closer item, so the cost depends on how many items
+    are near the query point rather than on the total number of items.
+
+    The grid can be shared between threads. Each cell hashes to one of
+    `lock_regions` locks, held only while that cell's bucket changes or is
+    copied; queries score the copied items after releasing it, so searches in
+    different parts of the grid, and the distance math of any search, run
+    without blocking each other or updates. Updates of any one item must not
+    race each other (FleetManager serializes them per vehicle).
+
+    Attributes:
+        cell_size (float): Width and height of a grid cell in degrees.
+        cells (dict): Maps (row, col) cell -> {item_id: (lat, lon)}.
+        item_cells (dict): Maps item_id -> (row, col) cell it is stored in.
+        region_locks (list): Locks guarding the cell buckets, picked by hashing the cell.
+
+    Example:
+        index = GridSpatialIndex(cell_size=0.01)
+        index.insert("V001", (25.1972, 55.2744))
+        index.insert("V002", "25.0772, 55.1330")
+        index.nearest((25.1985, 55.2796), k=1)  # [(0.54..., 'V001')]
+    """
+
+    def __init__(self, cell_size=0.01, lock_regions=64):
+        self.cell_size = cell_size
+        self.cells = defaultdict(dict)
+        self.item_cells = {}
+        self.region_locks = [threading.Lock() for _ in range(lock_regions)]
+
+    def __len__(self):
+        return len(self.item_cells)
+
+    def __contains__(self, item_id):
+        return item_id in self.item_cells
+
+    def insert(self, item_id, location_geo):
+        """
+        Adds an item, or moves it if it is already indexed.
+
+        Args:
+            item_id (str): Unique identifier of the item (e.g., vehicle ID).
+            location_geo (tuple or str): Coordinates of the item.
+
+        Returns:
+            bool: True if the item was indexed, False if the coordinates are invalid.
+        """
+        point = parse_geo(location_geo)
+        if point is None:
+            self.remove(item_id)
+            return False
+
+        cell = self._cell(*point)
+        old_cell = self.item_cells.get(item_id)
+        if old_cell is not None and old_cell != cell:
+            with self._region_lock(old_cell):
+                self._discard(old_cell, item_id)
+        with self._region_lock(cell):
+            self.cells[cell][item_id] = point
+        self.item_cells[item_id] = cell
+        return True
+
+    def remove(self, item_id):
+        """
+        Removes an item from the index if present.
+
+        Args:
+            item_id (str): Item to remove.
+        """
+        cell = self.item_cells.pop(item_id, None)
+        if cell is not None:
+            with self._region_lock(cell):
+                self._discard(cell, item_id)
+
+    def nearest(self, location_geo, k=1, radius_km=None, predicate=None):
+        """
+        Finds the items closest to a point.
+
+        Args:
+            location_geo (tuple or str): Query coordinates.
+            k (int, optional): Maximum number of items to return; None for no limit.
+            radius_km (float, optional): Ignore items farther than this distance.
+            predicate (callable, optional): Only items for which predicate(item_id) is true are returned.
+
+        Returns:
+            list: (distance_km, item_id) tuples sorted by distance.
+        """
+        point = parse_geo(location_geo)
+        if point is None or k == 0 or not self.item_cells:
+            return []
+
+        lat = point[0]
+        row, col = self._cell(*point)
+        best = []  # max-heap of (-distance, item_id) when k is set, plain list otherwise
+        remaining = len(self.item_cells)
+        ring = 0
+
+        while remaining > 0:
+            bound = self._ring_min_km(lat, ring)
+            if radius_km is not None and bound > radius_km:
+                break
+            if k is not None and len(best) >= k and bound > -best[0][0]:
+                break
+
+            if 8 * ring > len(self.cells):
+                # Sparse grid: sweeping the perimeter costs more than scanning occupied cells
+                cells = [c for c in list(self.cells) if max(abs(c[0] - row), abs(c[1] - col)) >= ring]
+                remaining = 0
+            else:
+                cells = self._ring_cells(row, col, ring)
+
+            for cell in cells:
+                if cell not in self.cells:
+                    continue
+                with self._region_lock(cell):
+                    bucket = self.cells.get(cell)
+                    items = list(bucket.items()) if bucket else ()
+                remaining -= len(items)
+                for item_id, item_point in items:
+                    if predicate is not None and not predicate(item_id):
+                        continue
+                    distance = haversine(point, item_point)
+                    if radius_km is not None and distance > radius_km:
+                        continue
+                    if k is None:
+                        best.append((-distance, item_id))
+                    elif len(best) < k:
+                        heapq.heappush(best, (-distance, item_id))
+                    elif distance < -best[0][0]:
+                        heapq.heapreplace(best, (-distance, item_id))
+            ring += 1
+
+        return sorted((-neg_distance, item_id) for neg_distance, item_id in best)
+
+    def within_radius(self, location_geo, radius_km, predicate=None):
+        """
+        Finds every item within a distance of a point.
+
+        Args:
+            location_geo (tuple or str): Query coordinates.
+            radius_km (float): Search radius in kilometers.
+            predicate (callable, optional): Only items for which predicate(item_id) is true are returned.
+
+        Returns:
+            list: (distance_km, item_id) tuples sorted by distance.
+        """
+        return self.nearest(location_geo, k=None, radius_km=radius_km, predicate=predicate)
+
+    def _cell(self, lat, lon):
+        return (math.floor(lat / self.cell_size), math.floor(lon / self.cell_size))
+
+    def _region_lock(self, cell):
+        return self.region_locks[hash(cell) % len(self.region_locks)]
+
+    def _discard(self, cell, item_id):
+        bucket = self.cells.get(cell)
+        if bucket is not None:
+            bucket.pop(item_id, None)
+            if not bucket:
+                del self.cells[cell]
+
+    @staticmethod
+    def _ring_cells(row, col, ring):
+        """Returns the cells at Chebyshev distance `ring` from (row, col)."""
+        if ring == 0:
+            return [(row, col)]
+        cells = []
+        for dc in range(-ring, ring + 1):
+            cells.append((row - ring, col + dc))
+            cells.append((row + ring, col + dc))
+        for dr in range(-ring + 1, ring):
+            cells.append((row + dr, col - ring))
+            cells.append((row + dr, col + ring))
+        return cells
+
+    def _ring_min_km(self, lat, ring):
+        """
+        Conservative lower bound on the distance from a point to any item in a ring.
+
+        An item `ring` cells away differs from the point by at least ring - 1 cells
+        in latitude or longitude. Longitude degrees shrink towards the poles, so the
+        bound uses the highest latitude the ring can reach.
+        """
+        if ring <= 1:
+            return 0.0
+        max_lat = min(abs(lat) + ring * self.cell_size, 90.0)
+        return 0.99 * (ring - 1) * self.cell_size * KM_PER_DEGREE * math.cos(math.radians(max_lat))
@@ -0,0 +1,244 @@
+"""
+Stress test: concurrent request_ride / end_ride / update_traffic on one SystemManager.
+
+Worker threads hammer a shared SystemManager with ride requests, ride ends,
+traffic updates, searches and history reads, in immediate and batch dispatch
+mode. A vehicle handed to two requests makes _assign raise RuntimeError; the
+run also checks at the end that every ongoing ride belongs to an assigned
+vehicle, that the fleet's status index agrees with the vehicles and that every
+assignment was either ended or is still ongoing.
+
+A second run has several threads route on a cold NavigationGraph at once, so
+they all race to freeze() it, while another thread keeps adding roads; every
+graph must end up with all its roads and the right distances. A third run
+reads a cached route from many threads while another thread keeps changing
+the live weight of a road on it.
+
+Usage:
+    python stress_dispatch.py
+"""
+import contextlib
+import os
+import random
+import sys
+import threading
+import time
+from NavigationGraph import NavigationGraph
+from systemmanager import SystemManager
+
+VEHICLES = 50
+PASSENGERS = 200
+THREADS = 8
+OPERATIONS = 2_000  # per thread
+CENTER = (25.1972, 55.2744)
+ROADS = 2_000
+GRAPH_RUNS = 20
+
+
+def make_system(batch_mode, seed=42):
+    """Returns a SystemManager with VEHICLES drivers and vehicles and PASSENGERS passengers."""
+    rng = random.Random(seed)
+    system = SystemManager(batch_mode=batch_mode, batch_size=8, batch_interval_ms=5)
+    for i in range(VEHICLES):
+        system.register_user({"user_id": f"D{i}", "name": f"Driver {i}", "role": "driver"})
+        system.add_vehicle({
+            "vehicle_id": f"V{i}",
+            "vehicle_type": "car",
+            "status": "available",
+            "location": f"Spot {i}",
+            "location_geo": random_point(rng),
+            "driver_id": f"D{i}",
+        })
+    for i in range(PASSENGERS):
+        system.register_user({"user_id": f"U{i}", "name": f"Passenger {i}", "role": "passenger"})
+    return system
+
+
+def random_point(rng):
+    return (CENTER[0] + rng.uniform(-0.05, 0.05), CENTER[1] + rng.uniform(-0.05, 0.05))
+
+
+def worker(system, seed, errors):
+    """Runs OPERATIONS random operations against the shared system."""
+    rng = random.Random(seed)
+    try:
+        for _ in range(OPERATIONS):
+            action = rng.random()
+            if action < 0.4:
+                system.request_ride(f"U{rng.randrange(PASSENGERS)}", "Pickup", random_point(rng), "car",
+                                    "Dropoff", random_point(rng), priority=rng.randrange(2))
+                if system.batch_mode:
+                    system.tick()
+            elif action < 0.7:
+                system.end_ride(f"V{rng.randrange(VEHICLES)}", rating=rng.randint(1, 5))
+            elif action < 0.85:
+                system.update_traffic(f"V{rng.randrange(VEHICLES)}", rng.uniform(0, 10))
+            elif action < 0.95:
+                system.search_rides({"min_rating": 4, "order_by": "-date", "limit": 10})
+                list(system.view_ride_history(f"U{rng.randrange(PASSENGERS)}", limit=5))
+            else:
+                system.top_drivers(5)
+    except Exception as e:  # RuntimeError from _assign means a vehicle was handed out twice
+        errors.append(e)
+
+
+def check(system):
+    """Returns a list of invariant violations in the final state of the system."""
+    problems = []
+    fleet = system.fleet_manager
+    assigned = {vehicle_id for vehicle_id, vehicle in fleet.vehicles.items() if vehicle.status == "assigned"}
+    ongoing = set(system.ongoing_rides)
+    if assigned != ongoing:
+        problems.append(f"assigned vehicles {sorted(assigned ^ ongoing)} disagree with ongoing rides")
+    for status, vehicles in fleet.vehicles_by_status.items():
+        for vehicle_id, vehicle in vehicles.items():
+            if vehicle.status != status:
+                problems.append(f"{vehicle_id} indexed as {status} but is {vehicle.status}")
+    indexed = sum(len(vehicles) for vehicles in fleet.vehicles_by_status.values())
+    if indexed != len(fleet.vehicles):
+        problems.append(f"{indexed} vehicles in the status index, {len(fleet.vehicles)} in the fleet")
+    return problems
+
+
+def run(batch_mode):
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        system = make_system(batch_mode)
+    assignments = []
+    assign = system._assign
+
+    def counting_assign(vehicle, ride_request):
+        assign(vehicle, ride_request)
+        assignments.append(vehicle.vehicle_id)
+
+    system._assign = counting_assign
+    errors = []
+    threads = [threading.Thread(target=worker, args=(system, seed, errors)) for seed in range(THREADS)]
+    start = time.perf_counter()
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if batch_mode:
+            system.dispatch_pending()
+    elapsed = time.perf_counter() - start
+    system.close()
+
+    problems = check(system) + [f"{type(e).__name__}: {e}" for e in errors]
+    ended = len(system.ride_history_manager.stack)
+    if len(assignments) != ended + len(system.ongoing_rides):
+        problems.append(f"{len(assignments)} assignments but {ended} ended and "
+                        f"{len(system.ongoing_rides)} ongoing")
+    mode = "batch" if batch_mode else "immediate"
+    print(f"{mode:>9}: {THREADS * OPERATIONS:,} operations in {elapsed:.2f}s, "
+          f"{len(assignments):,} assignments, {ended:,} rides ended, "
+          f"{len(system.ongoing_rides)} ongoing")
+    for problem in problems:
+        print(f"  FAIL {problem}")
+    return not problems
+
+
+def run_graph():
+    """Routes on cold graphs from several threads while roads are being added."""
+    problems = []
+    start = time.perf_counter()
+    for _ in range(GRAPH_RUNS):
+        graph = NavigationGraph()
+        for i in range(ROADS):
+            graph.add_road(f"N{i}", f"N{i + 1}", 1)
+        errors = []
+
+        def route():
+            try:
+                for _ in range(5):
+                    graph.one_to_many("N0", ["N5", f"N{ROADS}"])
+            except Exception as e:
+                errors.append(e)
+
+        def extend():
+            try:
+                for i in range(ROADS, ROADS + 5):
+                    graph.add_road(f"N{i}", f"N{i + 1}", 1)
+                    graph.update_live_weights([("N0", "N1", 1)])
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=route) for _ in range(THREADS // 2)]
+        threads.append(threading.Thread(target=extend))
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        problems += [f"{type(e).__name__}: {e}" for e in errors]
+        graph.freeze()
+        if len(graph.targets) != 2 * (ROADS + 5):
+            problems.append(f"{len(graph.targets)} edges after freezing, expected {2 * (ROADS + 5)}")
+        if graph.one_to_many("N0", ["N5", f"N{ROADS + 5}"]) != [5.0, ROADS + 5.0]:
+            problems.append("wrong distances after concurrent freezing")
+        if problems:
+            break
+    elapsed = time.perf_counter() - start
+    print(f"{'routing':>9}: {GRAPH_RUNS} cold graphs of {ROADS:,} roads in {elapsed:.2f}s")
+    for problem in problems:
+        print(f"  FAIL {problem}")
+    return not problems
+
+
+def run_cached_routes():
+    """Reads one cached route from several threads while live traffic keeps invalidating it."""
+    graph = NavigationGraph(cache_size=4)
+    for a, b, distance in (("N0", "N1", 1), ("N1", "N2", 1), ("N2", "N3", 1), ("N0", "N3", 5)):
+        graph.add_road(a, b, distance)
+    errors = []
+    wrong = []
+    done = threading.Event()
+
+    def route():
+        try:
+            while not done.is_set():
+                distance, _ = graph.shortest_path("N0", "N3")
+                if distance not in (3.0, 5.0):
+                    wrong.append(distance)
+        except Exception as e:
+            errors.append(e)
+
+    def traffic():
+        try:
+            for i in range(OPERATIONS):
+                graph.update_live_weights([("N0", "N1", 1 if i % 2 else 10)])
+        except Exception as e:
+            errors.append(e)
+        finally:
+            done.set()
+
+    threads = [threading.Thread(target=route) for _ in range(THREADS)]
+    threads.append(threading.Thread(target=traffic))
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    problems = [f"{type(e).__name__}: {e}" for e in errors]
+    if wrong:
+        problems.append(f"{len(wrong)} routes with impossible distances, e.g. {wrong[0]}")
+    if graph.shortest_path("N0", "N3")[0] != 3.0:  # the last update set N0-N1 back to 1
+        problems.append("stale cached route after the last traffic update")
+    stats = graph.route_cache.stats()
+    print(f"{'cached':>9}: {OPERATIONS:,} traffic updates in {elapsed:.2f}s, "
+          f"{stats['hits']:,} cache hits, {stats['invalidations']:,} invalidations")
+    for problem in problems:
+        print(f"  FAIL {problem}")
+    return not problems
+
+
+def main():
+    sys.setswitchinterval(1e-5)  # switch threads often to provoke races
+    ok = all([run(batch_mode=False), run(batch_mode=True), run_graph(), run_cached_routes()])
+    print("no double assignment" if ok else "FAILED")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
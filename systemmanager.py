@@ -1,247 +1,558 @@
-from fleet_manager import FleetManager
-from RidePriorityQueue import RidePriorityQueue
-from ride_history import RideHistoryManager,RideLog
-from user_manager import UserManager, User
-from smarttraffic import TrafficManager
-from Ride_search_filtering import RideSearchManager,Ride
-from NavigationGraph import NavigationGraph
-from AVLtree import UserAVLTree
-from ride_request import RideRequest,RideRequestQueue  # You can define this simple class in ride_request.py
-import math
-import random
-import uuid
-import datetime
-
-class SystemManager:
-    """
-    Coordinates and manages core operations in the ride-hailing platform.
-
-    This class integrates multiple subsystems including fleet management, ride prioritization,
-    ride history, traffic data, user accounts, and ride searching to deliver intelligent ride
-    assignment and user service features.
-    """
-
-    def __init__(self):
-        """
-        Initializes all core managers and components required by the system.
-        """
-        self.fleet_manager = FleetManager()
-        self.ride_priority_queue = RidePriorityQueue()
-        self.ride_history_manager = RideHistoryManager()
-        self.ride_request_queue = RideRequestQueue()
-        self.user_manager = UserManager()
-        self.traffic_manager = TrafficManager()
-        self.ride_search_manager = RideSearchManager()
-        self.navigation_graph=NavigationGraph()
-        self.tree=UserAVLTree()
-        self.ongoing_rides = {}
-
-    def register_user(self, user_details):
-        """
-        Registers a new user in the system.
-
-        Args:
-            user_details (dict): Information needed to create a User object.
-        """
-        user = User(**user_details)
-        self.user_manager.add_user(user)
-        #add to tree
-
-    def add_vehicle(self, vehicle_details):
-        """
-        Adds a vehicle to the fleet for ride allocation.
-
-        Args:
-            vehicle_details (dict): Contains vehicle_id, type, location, etc.
-        """
-        self.fleet_manager.add_vehicle(**vehicle_details)
-
-    def request_ride(self, user_id, location, location_geo, vehicle_type,destination, destination_geo):
-        """
-        Submits a new ride request from a user.
-
-        Args:
-            user_id (str): ID of the requesting user.
-            location (str): Textual pickup location.
-            location_geo (tuple): Geographical coordinates of pickup location.
-            vehicle_type (str): Requested type of vehicle (e.g., 'Sedan', 'SUV')
-            next_location (str)  destination
-            next_location_geo (tuple):Geographical coordinates of destination
-        """
-        ride_request = RideRequest(user_id, location, location_geo,destination, destination_geo,vehicle_type)
-        self.ride_request_queue.add_request(ride_request)
-        self.assign_vehicle_to_ride(ride_request)
-
-    def assign_vehicle_to_ride(self, ride_request):
-        """
-        Assigns the best available vehicle to the given ride request
-        based on location, delay, and urgency using a priority queue.
-
-        Args:
-            ride_request (RideRequest): The incoming ride request to fulfill.
-        """
-        vehicles = self.fleet_manager.get_available_vehicles()
-        for vehicle in vehicles:
-            distance = self.calculate_distance(vehicle.location_geo, ride_request.location_geo)
-            delay = self.traffic_manager.get_delay(vehicle.vehicle_id)
-            urgency = self.estimate_urgency(ride_request)
-
-            priority = distance + delay - urgency  # lower is better
-            self.ride_priority_queue.add_vehicle(vehicle.vehicle_id, priority)
-        
-        best_vehicle_id,priority_score = self.ride_priority_queue.get_best_vehicle()
-        print(f"Best vehicle: {best_vehicle_id}, priority score: {priority_score}")
-        if best_vehicle_id:
-          current = self.fleet_manager.head
-          while current:
-            if current.vehicle_id == best_vehicle_id:
-               current.status = "assigned"
-               current.next_location = ride_request.destination
-               current.next_location_geo = ride_request.destination_geo
-               print(f"Assigned vehicle {current.vehicle_id} to user {ride_request.user_id}.")
-               self.ongoing_rides[best_vehicle_id] = ride_request
-               break
-            current = current.next
-            
-
-    def search_rides(self, criteria):
-        """
-        Searches for rides that match specific criteria.
-
-        Args:
-            criteria (dict): Dictionary of filters (e.g., user_id, date range).
-
-        Returns:
-            list: Matching rides.
-        """
-        return self.ride_search_manager.search(criteria)
-
-    def view_ride_history(self, user_id):
-        """
-        Retrieves the ride history for a specific user.
-
-        Args:
-            user_id (str): The ID of the user.
-
-        Returns:
-            list: List of past rides.
-        """
-        return self.ride_history_manager.view_history(user_id)
-
-    def rebook_last_ride(self, user_id):
-        """
-        Attempts to rebook the user's most recent ride.
-
-        Args:
-            user_id (str): The ID of the user.
-        """
-        last_ride = self.ride_history_manager.rebook_last_ride(user_id)
-        if last_ride:
-            self.request_ride(user_id, last_ride.location, last_ride.vehicle_type)
-
-    def update_traffic(self, vehicle_id, delay):
-        """
-        Updates the traffic delay for a specific vehicle.
-
-        Args:
-            vehicle_id (str): The ID of the vehicle.
-            delay (float): Delay in minutes or other units.
-        """
-        self.traffic_manager.update_traffic(vehicle_id, delay)
-
-    @staticmethod
-    def calculate_distance(loc1, loc2):
-        """
-        Calculates the great-circle distance between two coordinates using the Haversine formula.
-
-        Args:
-            loc1 (tuple): (latitude, longitude) of point A.
-            loc2 (tuple): (latitude, longitude) of point B.
-
-        Returns:
-            float: Distance in kilometers.
-        """
-        lat1, lon1 = loc1
-        lat2, lon2 = loc2
-        
-        R = 6371.0  # Radius of the Earth in kilometers
-        phi1 = math.radians(lat1)
-        phi2 = math.radians(lat2)
-        delta_phi = math.radians(lat2 - lat1)
-        delta_lambda = math.radians(lon2 - lon1)
-        
-        a = math.sin(delta_phi / 2)**2 + math.cos(phi1) * math.cos(phi2) * math.sin(delta_lambda / 2)**2
-        c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
-        distance = R * c
-        return distance
-
-    @staticmethod
-    def estimate_urgency(ride_request):
-        """
-        Estimates the urgency score for a ride request (currently randomized).
-
-        Args:
-            ride_request (RideRequest): The ride request being evaluated.
-
-        Returns:
-            float: An urgency score; higher values indicate higher urgency.
-        """
-        return random.uniform(0, 5)  # Simulated for now
-      
-    def end_ride(self, vehicle_id, arrived=True, current_location=None, current_location_geo=None, rating=5.0):
-        """
-        Ends the ride for the given vehicle and logs it into ride history.
-        Args:
-          vehicle_id (str): ID of the vehicle ending the ride.
-          arrived (bool): Whether the vehicle has reached its destination.
-          current_location (str, optional): Used if the vehicle hasn't arrived.
-          current_location_geo (str, optional): Coordinates of the current location.
-          rating (float): Rating for the ride (default is 5.0).
-        """
-        current = self.fleet_manager.head
-        while current:
-          if current.vehicle_id == vehicle_id:
-            # Retrieve ride details
-            vehicle = self.fleet_manager.get_vehicle_by_id(vehicle_id)
-            if vehicle_id not in self.ongoing_rides:
-              print(f"❗ Vehicle {vehicle_id} is not currently assigned to any ride.")
-              return
-            
-            ride_request = self.ongoing_rides[vehicle_id]
-            if arrived:
-               current.location = current.next_location
-               current.location_geo = current.next_location_geo
-               end_location = current.next_location
-            elif current_location and current_location_geo:
-                 current.location = current_location
-                 current.location_geo = current_location_geo
-                 end_location = current_location
-            else:
-                print(f"❗ Cannot end ride — incomplete location data.")
-                return
-
-            current.next_location = None
-            current.next_location_geo = None
-            current.status = "available"
-
-            # Log ride
-            ride_id = str(uuid.uuid4())
-            log = RideLog(
-              ride_id=ride_id,
-              user_id=ride_request.user_id,
-              vehicle_id=vehicle_id,
-              location=end_location,
-              rating=rating
-              )
-            current_time = datetime.datetime.now()
-            ride=Ride(ride_id,end_location,vehicle_id,rating, current_time)
-            self.ride_history_manager.add_ride(log)
-            self.ride_search_manager.add_ride(ride)
-            if vehicle_id in self.ongoing_rides:
-               del self.ongoing_rides[vehicle_id]
-            print(f"❗ Vehicle {vehicle_id} ride ended.")
-            return
-          current = current.next
-
-        print(f"❗ Vehicle {vehicle_id} not found in fleet.")
-
+from fleet_manager import FleetManager
+from RidePriorityQueue import RidePriorityQueue
+from ride_history import RideHistoryManager,RideLog
+from ride_log_store import RideLogStore
+from user_manager import UserManager, User
+from smarttraffic import TrafficManager
+from Ride_search_filtering import RideSearchManager,Ride
+from NavigationGraph import NavigationGraph
+from AVLtree import UserAVLTree
+from geo_utils import haversine, haversine_many, haversine_matrix
+from batch_dispatch import solve_assignment
+from vehicle_node import normalize_vehicle_type
+from ride_request import RideRequest,RideRequestQueue  # You can define this simple class in ride_request.py
+import math
+import random
+import threading
+import time
+import uuid
+import datetime
+
+class SystemManager:
+    """
+    Coordinates and manages core operations in the ride-hailing platform.
+
+    This class integrates multiple subsystems including fleet management, ride prioritization,
+    ride history, traffic data, user accounts, and ride searching to deliver intelligent ride
+    assignment and user service features.
+
+    request_ride, end_ride and update_traffic may be called from several
+    threads. A vehicle is taken with FleetManager.claim_vehicle, a
+    compare-and-set on its status, so two requests can never be given the same
+    vehicle; the fleet itself is guarded by per-vehicle lock shards. Separate
+    locks cover the ongoing rides, the ride log writers and the leaderboards,
+    so dispatches only contend where they touch the same data. Searches and
+    history views take no lock: the stores publish a ride only once it is fully
+    indexed.
+    """
+
+    def __init__(self, batch_mode=False, batch_size=32, batch_interval_ms=500, batch_method="hungarian",
+                 history_dir=None, queue_capacity=None, queue_overflow="reject", max_dispatch_attempts=20):
+        """
+        Initializes all core managers and components required by the system.
+
+        Args:
+            batch_mode (bool): Queue ride requests and match them to vehicles in batches
+                instead of assigning each request as soon as it arrives.
+            batch_size (int): Dispatch a batch once this many requests are pending.
+            batch_interval_ms (int): Dispatch a batch once the oldest pending request
+                has waited this long.
+            batch_method (str): Assignment solver, 'hungarian' or 'greedy'.
+            history_dir (str, optional): Persist ride history to an append-only log
+                in this directory and reload it on startup.
+            queue_capacity (int, optional): Maximum number of pending ride requests.
+            queue_overflow (str): What to do with requests beyond queue_capacity:
+                'reject', 'drop-oldest' or 'spill' (see RideRequestQueue).
+            max_dispatch_attempts (int, optional): Dispatch attempts without a vehicle
+                after which a request is dropped and counted as dead-lettered in the
+                queue's stats(); None retries forever.
+        """
+        self.fleet_manager = FleetManager()
+        store = RideLogStore(history_dir) if history_dir is not None else None
+        self.ride_history_manager = RideHistoryManager(store=store)
+        self.ride_request_queue = RideRequestQueue(queue_capacity, queue_overflow,
+                                                   max_attempts=max_dispatch_attempts)
+        self.user_manager = UserManager()
+        self.traffic_manager = TrafficManager()
+        self.ride_search_manager = RideSearchManager()
+        self.navigation_graph=NavigationGraph()
+        self.tree=UserAVLTree(key="rating")  # driver leaderboard by rating
+        self.ride_count_tree = UserAVLTree(key="ride_count")  # driver leaderboard by rides
+        self.ongoing_rides = {}
+        self.dispatch_candidates = 20  # nearest available vehicles scored per request
+        self.dispatch_radius_km = None  # optional cut-off for candidate vehicles
+        self.batch_mode = batch_mode
+        self.batch_size = batch_size
+        self.batch_interval_ms = batch_interval_ms
+        self.batch_method = batch_method
+        self.last_dispatch = time.monotonic()
+        self.rides_lock = threading.Lock()  # ongoing_rides
+        self.log_lock = threading.Lock()  # ride history and search writers
+        self.leaderboard_lock = threading.RLock()  # rating and ride-count trees
+
+    def register_user(self, user_details):
+        """
+        Registers a new user in the system.
+
+        Args:
+            user_details (dict): Information needed to create a User object.
+
+        Drivers are added to the rating and ride-count leaderboards, which then
+        follow the driver's rating and ride count as rides end.
+        """
+        user = User(**user_details)
+        self.user_manager.add_user(user)
+        if user.role == "driver":
+            with self.leaderboard_lock:
+                self.tree.insert(user)
+                self.ride_count_tree.insert(user)
+
+    def top_drivers(self, k=10, by="rating"):
+        """
+        Returns the leaderboard of drivers.
+
+        Args:
+            k (int): Number of drivers to return.
+            by (str): 'rating' or 'ride_count'.
+
+        Returns:
+            list: Up to k User objects, best first.
+        """
+        tree = self.tree if by == "rating" else self.ride_count_tree
+        with self.leaderboard_lock:
+            return tree.top_k(k)
+
+    def add_vehicle(self, vehicle_details):
+        """
+        Adds a vehicle to the fleet for ride allocation.
+
+        Args:
+            vehicle_details (dict): Contains vehicle_id, type, location, etc.
+        """
+        self.fleet_manager.add_vehicle(**vehicle_details)
+
+    def request_ride(self, user_id, location, location_geo, vehicle_type,destination, destination_geo, priority=0):
+        """
+        Submits a new ride request from a user.
+
+        Args:
+            user_id (str): ID of the requesting user.
+            location (str): Textual pickup location.
+            location_geo (tuple): Geographical coordinates of pickup location.
+            vehicle_type (str): Requested type of vehicle (e.g., 'Sedan', 'SUV')
+            next_location (str)  destination
+            next_location_geo (tuple):Geographical coordinates of destination
+            priority (int, optional): Priority class; higher is dispatched first
+                (e.g., 1 for premium or accessibility rides).
+
+        In immediate mode the queue is served in order, highest priority first,
+        until this request has had its turn; requests that find no vehicle stay
+        queued and are retried on the next call. In batch mode the request waits
+        in the queue until the batch is full or `batch_interval_ms` has elapsed,
+        then all pending requests are dispatched together.
+
+        Returns:
+            bool: False if the request queue was full and the request was rejected,
+            or in immediate mode if no vehicle could be assigned to it yet.
+        """
+        ride_request = RideRequest(user_id, location, location_geo,destination, destination_geo,vehicle_type, priority)
+        if not self.ride_request_queue.add_request(ride_request):
+            print(f"Ride request from user {user_id} rejected: request queue is full.")
+            return False
+        if not self.batch_mode:
+            return self._dispatch_until(ride_request)
+        if len(self.ride_request_queue) >= self.batch_size:
+            self.dispatch_pending()
+        else:
+            self.tick()
+        return True
+
+    def tick(self):
+        """
+        Dispatches the pending batch if `batch_interval_ms` has elapsed since the last one.
+
+        Meant to be called periodically (e.g., by a scheduler) so that a partial
+        batch is not left waiting when requests stop arriving.
+
+        Returns:
+            int: Number of rides assigned.
+        """
+        if (time.monotonic() - self.last_dispatch) * 1000 >= self.batch_interval_ms:
+            return self.dispatch_pending()
+        return 0
+
+    def dispatch_pending(self):
+        """
+        Matches pending ride requests to available vehicles in one pass.
+
+        Up to `batch_size` requests are drained from the queue, highest priority
+        first, so a surge backlog is matched in bounded batches. Candidate
+        vehicles are the nearest available ones of the requested type to each
+        pickup. A cost matrix of
+        pickup distance plus traffic delay is built over the batch and the union
+        of their candidates, and solved as an assignment
+        problem so the total pickup distance of the batch is minimized. Requests
+        left without a vehicle, or whose vehicle was claimed by a concurrent
+        dispatch in the meantime, go back to the queue for the next batch.
+
+        Returns:
+            int: Number of rides assigned.
+        """
+        self.last_dispatch = time.monotonic()
+        requests = self.ride_request_queue.drain(self.batch_size)
+        if not requests:
+            return 0
+
+        vehicles = {}
+        for ride_request in requests:
+            for distance, vehicle in self.fleet_manager.find_nearest_available(
+                ride_request.location_geo, k=self.dispatch_candidates, radius_km=self.dispatch_radius_km,
+                vehicle_type=ride_request.vehicle_type,
+            ):
+                vehicles[vehicle.vehicle_id] = vehicle
+        vehicles = list(vehicles.values())
+
+        matches = []
+        pickups = [r.location_geo for r in requests]
+        routable = [i for i, pickup in enumerate(pickups) if pickup is not None]
+        if vehicles and routable:
+            distances = haversine_matrix(
+                [pickups[i] for i in routable],
+                self.fleet_manager.positions([v.vehicle_id for v in vehicles]),
+            )
+            delays = self.traffic_manager.get_delays([v.vehicle_id for v in vehicles])
+            types = [normalize_vehicle_type(v.vehicle_type) for v in vehicles]
+            cost = []
+            for r, row in zip(routable, distances):
+                # Candidates of other requests may be of a type this request cannot use
+                wanted = normalize_vehicle_type(requests[r].vehicle_type)
+                cost.append([
+                    # NaN: the vehicle was removed from the fleet after it was found
+                    math.inf if math.isnan(d) or (self.dispatch_radius_km is not None and d > self.dispatch_radius_km)
+                    or (wanted is not None and vehicle_type != wanted) else d + delay
+                    for d, delay, vehicle_type in zip(row, delays, types)
+                ])
+            matches = [(routable[r], c) for r, c in solve_assignment(cost, self.batch_method)]
+
+        matched = set()
+        for r, c in matches:
+            if self.fleet_manager.claim_vehicle(vehicles[c].vehicle_id):
+                self._assign(vehicles[c], requests[r])
+                matched.add(r)
+        self._requeue([ride_request for i, ride_request in enumerate(requests) if i not in matched])
+        print(f"Batch dispatch: {len(matched)} of {len(requests)} requests assigned.")
+        return len(matched)
+
+    def _dispatch_until(self, ride_request):
+        """Assigns queued requests in service order until `ride_request` has been tried; returns its outcome."""
+        unassigned = []
+        assigned = False
+        while True:
+            next_request = self.ride_request_queue.process_next_request()
+            if next_request is None:
+                break  # taken by a concurrent call, or dropped by the overflow policy
+            if self.assign_vehicle_to_ride(next_request):
+                if next_request is ride_request:
+                    assigned = True
+                    break
+            else:
+                unassigned.append(next_request)
+                if next_request is ride_request:
+                    break
+        self._requeue(unassigned)
+        return assigned
+
+    def _requeue(self, requests):
+        """Puts requests that found no vehicle back in the queue, reporting dead-lettered ones."""
+        for ride_request in self.ride_request_queue.requeue(requests):
+            print(f"Ride request from user {ride_request.user_id} dropped after "
+                  f"{ride_request.attempts} dispatch attempts.")
+
+    def assign_vehicle_to_ride(self, ride_request):
+        """
+        Assigns the best available vehicle to the given ride request
+        based on location, delay, and urgency using a priority queue.
+
+        Only the `dispatch_candidates` nearest available vehicles of the requested
+        type (found through the fleet's spatial and type indexes) are scored, so
+        the cost does not grow with fleet size.
+        If the best vehicle is claimed by another request first, the next best is tried.
+
+        Args:
+            ride_request (RideRequest): The incoming ride request to fulfill.
+
+        Returns:
+            bool: True if a vehicle was assigned.
+        """
+        if ride_request is None:
+            return False
+        candidates = self.fleet_manager.find_nearest_available(
+            ride_request.location_geo, k=self.dispatch_candidates, radius_km=self.dispatch_radius_km,
+            vehicle_type=ride_request.vehicle_type,
+        )
+        candidates = self.rank_by_road_distance(ride_request.location, candidates)
+        urgency = self.estimate_urgency(ride_request)
+        delays = self.traffic_manager.get_delays([vehicle.vehicle_id for _, vehicle in candidates])
+        scored = []
+        for (distance, vehicle), delay in zip(candidates, delays):
+            priority = distance + delay - urgency  # lower is better
+            scored.append((vehicle.vehicle_id, priority))
+
+        # One queue per call, holding only this request's candidates
+        ride_priority_queue = RidePriorityQueue()
+        ride_priority_queue.build(scored)
+        while True:
+            best = ride_priority_queue.get_best_vehicle()
+            if best is None:
+                print(f"No available vehicle for user {ride_request.user_id}.")
+                return False
+            best_vehicle_id,priority_score = best
+            if self.fleet_manager.claim_vehicle(best_vehicle_id):
+                break
+        print(f"Best vehicle: {best_vehicle_id}, priority score: {priority_score}")
+        current = self.fleet_manager.get_vehicle_by_id(best_vehicle_id)
+        if current is None:
+            return False
+        self._assign(current, ride_request)
+        return True
+
+    def rank_by_road_distance(self, location, candidates):
+        """
+        Replaces straight-line candidate distances with road distances when every candidate has one.
+
+        All road distances come from a single one-to-many search on the navigation
+        graph. Road weights are in the graph's own units (distances, or travel
+        times once live traffic is applied), so they are converted back to
+        kilometers with the graph's `heuristic_scale` (weight units per km) to stay
+        comparable with the traffic delays added by the caller. If any candidate
+        is off the road graph or unreachable, the straight-line ranking is kept
+        for all of them rather than mixing the two measures.
+
+        Args:
+            location (str): Pickup location name.
+            candidates (list): (distance_km, Vehicle) tuples.
+
+        Returns:
+            list: (distance_km, Vehicle) tuples sorted by distance.
+        """
+        if not candidates or location not in self.navigation_graph:
+            return candidates
+        road = self.navigation_graph.one_to_many(location, [vehicle.location for _, vehicle in candidates])
+        if any(road_distance == math.inf for road_distance in road):
+            return candidates
+        scale = self.navigation_graph.heuristic_scale
+        ranked = [
+            (road_distance / scale, vehicle)
+            for (_, vehicle), road_distance in zip(candidates, road)
+        ]
+        ranked.sort(key=lambda candidate: candidate[0])
+        return ranked
+
+    def _assign(self, vehicle, ride_request):
+        """
+        Records the ride of a vehicle that the caller has already claimed.
+
+        Raises:
+            RuntimeError: If the vehicle is already on a ride (it was claimed twice).
+        """
+        with self.rides_lock:
+            if vehicle.vehicle_id in self.ongoing_rides:
+                raise RuntimeError(f"vehicle {vehicle.vehicle_id} is already assigned to a ride")
+            vehicle.next_location = ride_request.destination
+            vehicle.next_location_geo = ride_request.destination_geo  # normalized by RideRequest
+            self.ongoing_rides[vehicle.vehicle_id] = ride_request
+        print(f"Assigned vehicle {vehicle.vehicle_id} to user {ride_request.user_id}.")
+            
+
+    def search_rides(self, criteria):
+        """
+        Searches for rides that match specific criteria.
+
+        Args:
+            criteria (dict): Filters accepted by RideSearchManager.search
+                (location, vehicle_type, min_rating, date).
+
+        Returns:
+            list: Matching rides.
+
+        Example:
+            >>> system.search_rides({"vehicle_type": "car", "min_rating": 4})
+        """
+        return self.ride_search_manager.search(**criteria)
+
+    def view_ride_history(self, user_id, limit=None, offset=0):
+        """
+        Retrieves the ride history for a specific user.
+
+        Args:
+            user_id (str): The ID of the user.
+            limit (int, optional): Maximum number of rides to return.
+            offset (int, optional): Number of latest rides to skip.
+
+        Returns:
+            list: Past rides, latest first.
+        """
+        return list(self.ride_history_manager.view_history(user_id, limit, offset))
+
+    def rebook_last_ride(self, user_id):
+        """
+        Attempts to rebook the user's most recent ride.
+
+        The new request goes from the recorded pickup to the destination the
+        user asked for, not to where the ride ended, which differs if it was
+        ended early. Rides logged without a destination fall back to the latter.
+
+        Args:
+            user_id (str): The ID of the user.
+        """
+        last_ride = self.ride_history_manager.rebook_last_ride(user_id)
+        if last_ride is None:
+            print(f"No previous ride found for user {user_id}.")
+            return
+        if last_ride.pickup_geo is None:
+            print(f"Cannot rebook ride {last_ride.ride_id} — pickup location was not recorded.")
+            return
+        if last_ride.destination_geo is not None:
+            destination, destination_geo = last_ride.destination, last_ride.destination_geo
+        else:
+            destination, destination_geo = last_ride.location, last_ride.location_geo
+        self.request_ride(user_id, last_ride.pickup, last_ride.pickup_geo, last_ride.vehicle_type,
+                          destination, destination_geo)
+
+    def update_traffic(self, vehicle_id, delay):
+        """
+        Updates the traffic delay for a specific vehicle.
+
+        Args:
+            vehicle_id (str): The ID of the vehicle.
+            delay (float): Delay in minutes or other units.
+        """
+        self.traffic_manager.update_traffic(vehicle_id, delay)
+
+    def update_road_traffic(self, road_updates):
+        """
+        Applies live road weights from a traffic feed to the navigation graph.
+
+        Args:
+            road_updates (iterable): (from_location, to_location, weight) tuples,
+                with weights in the same units as the road distances.
+
+        Returns:
+            int: Number of roads updated.
+        """
+        return self.navigation_graph.update_live_weights(road_updates)
+
+    @staticmethod
+    def calculate_distance(loc1, loc2):
+        """
+        Calculates the great-circle distance between two coordinates using the Haversine formula.
+
+        Args:
+            loc1 (tuple): (latitude, longitude) of point A.
+            loc2 (tuple): (latitude, longitude) of point B.
+
+        Returns:
+            float: Distance in kilometers.
+        """
+        return haversine(loc1, loc2)
+
+    @staticmethod
+    def calculate_distances(origin, coords):
+        """
+        Calculates the distances from one point to many coordinates in one vectorized call.
+
+        Args:
+            origin (tuple): (latitude, longitude) of the pickup point.
+            coords (array-like): (n, 2) array or flat buffer of candidate coordinates.
+
+        Returns:
+            numpy.ndarray or list: Distances in kilometers, aligned with coords.
+        """
+        return haversine_many(origin, coords)
+
+    @staticmethod
+    def estimate_urgency(ride_request):
+        """
+        Estimates the urgency score for a ride request (currently randomized).
+
+        Args:
+            ride_request (RideRequest): The ride request being evaluated.
+
+        Returns:
+            float: An urgency score; higher values indicate higher urgency.
+        """
+        return random.uniform(0, 5)  # Simulated for now
+      
+    def end_ride(self, vehicle_id, arrived=True, current_location=None, current_location_geo=None, rating=5.0):
+        """
+        Ends the ride for the given vehicle and logs it into ride history.
+        Args:
+          vehicle_id (str): ID of the vehicle ending the ride.
+          arrived (bool): Whether the vehicle has reached its destination.
+          current_location (str, optional): Used if the vehicle hasn't arrived.
+          current_location_geo (str, optional): Coordinates of the current location.
+          rating (float): Rating for the ride (default is 5.0).
+
+        The ride is taken out of `ongoing_rides` before the vehicle is made
+        available again, so a concurrent request can claim it straight away.
+        """
+        current = self.fleet_manager.get_vehicle_by_id(vehicle_id)
+        if current is None:
+            print(f"❗ Vehicle {vehicle_id} not found in fleet.")
+            return
+
+        with self.rides_lock:
+            # Retrieve ride details
+            ride_request = self.ongoing_rides.get(vehicle_id)
+            if ride_request is None:
+                print(f"❗ Vehicle {vehicle_id} is not currently assigned to any ride.")
+                return
+            if arrived:
+                end_location = current.next_location
+                end_location_geo = current.next_location_geo
+            elif current_location and current_location_geo:
+                end_location = current_location
+                end_location_geo = current_location_geo
+            else:
+                print(f"❗ Cannot end ride — incomplete location data.")
+                return
+
+            del self.ongoing_rides[vehicle_id]
+            current.next_location = None
+            current.next_location_geo = None
+        self.fleet_manager.update_vehicle_info(
+            vehicle_id, status="available", location=end_location, location_geo=end_location_geo
+        )
+
+        # Log ride
+        ride_id = str(uuid.uuid4())
+        log = RideLog(
+          ride_id=ride_id,
+          user_id=ride_request.user_id,
+          vehicle_id=vehicle_id,
+          location=end_location,
+          rating=rating,
+          vehicle_type=ride_request.vehicle_type,
+          pickup=ride_request.location,
+          pickup_geo=ride_request.location_geo,
+          location_geo=end_location_geo,
+          destination=ride_request.destination,
+          destination_geo=ride_request.destination_geo
+          )
+        current_time = datetime.datetime.now()
+        ride=Ride(ride_id,end_location,current.vehicle_type,rating, current_time)
+        with self.log_lock:
+            self.ride_history_manager.add_ride(log)
+            self.ride_search_manager.add_ride(ride)
+        driver = self.user_manager.get_user(current.driver_id)
+        passenger = self.user_manager.get_user(ride_request.user_id)
+        with self.leaderboard_lock:
+            if driver is not None:
+                driver.update_rating(rating)  # also counts the ride; leaderboards follow
+            if passenger is not None:
+                passenger.increment_ride_count()
+        print(f"❗ Vehicle {vehicle_id} ride ended.")
+
+    def close(self):
+        """
+        Shuts the system down, syncing the ride history store to disk.
+
+        Rides still inside the store's fsync window are only durable after this
+        call, so call it before the process exits.
+
+        Example:
+            >>> system = SystemManager(history_dir="data/ride_log")
+            >>> system.close()
+        """
+        with self.log_lock:
+            self.ride_history_manager.close()